@@ -0,0 +1,90 @@
+"""initial schema
+
+Databases created before migrations were tracked already have these tables;
+mark them as current with `alembic stamp 0001` instead of upgrading.
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-11-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('is_vegetarian', sa.Boolean(), nullable=True),
+        sa.Column('protein_target', sa.Integer(), nullable=True),
+        sa.Column('fiber_target', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_users_id', 'users', ['id'])
+    op.create_index('ix_users_name', 'users', ['name'], unique=True)
+
+    op.create_table(
+        'meals',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('cuisine_type', sa.String(), nullable=True),
+        sa.Column('is_vegetarian', sa.Boolean(), nullable=True),
+        sa.Column('calories', sa.Float(), nullable=True),
+        sa.Column('protein', sa.Float(), nullable=True),
+        sa.Column('fiber', sa.Float(), nullable=True),
+        sa.Column('carbs', sa.Float(), nullable=True),
+        sa.Column('fats', sa.Float(), nullable=True),
+        sa.Column('ingredients', sa.JSON(), nullable=True),
+        sa.Column('instructions', sa.Text(), nullable=True),
+        sa.Column('prep_time_minutes', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_meals_id', 'meals', ['id'])
+    op.create_index('ix_meals_name', 'meals', ['name'])
+
+    op.create_table(
+        'inventory',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('item_name', sa.String(), nullable=True),
+        sa.Column('quantity', sa.Integer(), nullable=True),
+        sa.Column('unit', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_inventory_id', 'inventory', ['id'])
+    op.create_index('ix_inventory_item_name', 'inventory', ['item_name'], unique=True)
+
+    op.create_table(
+        'meal_plans',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('date', sa.Date(), nullable=True),
+        sa.Column('meal_type', sa.String(), nullable=True),
+        sa.Column('meal_id', sa.Integer(), nullable=True),
+        sa.Column('eaten_outside', sa.Boolean(), nullable=True),
+        sa.ForeignKeyConstraint(['meal_id'], ['meals.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_meal_plans_id', 'meal_plans', ['id'])
+    op.create_index('ix_meal_plans_date', 'meal_plans', ['date'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('meal_plans')
+    op.drop_table('inventory')
+    op.drop_table('meals')
+    op.drop_table('users')
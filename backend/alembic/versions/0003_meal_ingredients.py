@@ -0,0 +1,86 @@
+"""meal ingredients
+
+Normalizes the ingredients JSON on meals into one row per ingredient and
+backfills rows for existing meals.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-11-19 00:00:00.000000
+
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Frozen copies of app.services.ingredients so this revision keeps working
+# if the application helpers change later
+def _canonical_name(name):
+    return re.sub(r"\s+", " ", name or "").strip().lower()
+
+
+def _parse_quantity(quantity):
+    if isinstance(quantity, (int, float)):
+        return float(quantity)
+
+    text = str(quantity or "").strip()
+    fraction = re.match(r"^(?:(\d+)\s+)?(\d+)/(\d+)", text)
+    if fraction:
+        whole, numerator, denominator = fraction.groups()
+        if int(denominator) == 0:
+            return None
+        return int(whole or 0) + int(numerator) / int(denominator)
+
+    number = re.match(r"^\d+(?:\.\d+)?", text)
+    return float(number.group()) if number else None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    meal_ingredients = op.create_table(
+        'meal_ingredients',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('meal_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('quantity', sa.Float(), nullable=True),
+        sa.Column('unit', sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(['meal_id'], ['meals.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_meal_ingredients_id', 'meal_ingredients', ['id'])
+    op.create_index('ix_meal_ingredients_meal_id', 'meal_ingredients', ['meal_id'])
+    op.create_index('ix_meal_ingredients_name_meal_id', 'meal_ingredients', ['name', 'meal_id'])
+
+    meals = sa.table('meals', sa.column('id', sa.Integer), sa.column('ingredients', sa.JSON))
+    rows = []
+    for meal_id, ingredients in op.get_bind().execute(sa.select(meals.c.id, meals.c.ingredients)):
+        for ingredient in ingredients or []:
+            # Older replies could be plain strings rather than objects
+            if not isinstance(ingredient, dict) or not isinstance(ingredient.get('name'), str):
+                continue
+            name = _canonical_name(ingredient['name'])
+            if not name:
+                continue
+            unit = ingredient.get('unit')
+            rows.append({
+                'meal_id': meal_id,
+                'name': name,
+                'quantity': _parse_quantity(ingredient.get('quantity')),
+                'unit': (_canonical_name(unit) or None) if isinstance(unit, str) else None,
+            })
+    if rows:
+        op.bulk_insert(meal_ingredients, rows)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('meal_ingredients')
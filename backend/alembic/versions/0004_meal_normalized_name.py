@@ -0,0 +1,61 @@
+"""meal normalized name
+
+Adds a unique normalized name to meals. Existing meals whose names differ
+only in case or whitespace are merged into the oldest one, and meal plans
+pointing at the merged meals are repointed.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-11-20 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('meals', sa.Column('normalized_name', sa.String(), nullable=True))
+    # Same normalization as app.services.ingredients.canonical_name
+    op.execute(
+        "UPDATE meals SET normalized_name = "
+        "lower(btrim(regexp_replace(coalesce(name, ''), '\\s+', ' ', 'g')))"
+    )
+
+    # Keep the oldest meal of each name, repoint plans at it, drop the rest;
+    # their meal_ingredients rows go with them through ON DELETE CASCADE
+    op.execute(
+        """
+        CREATE TEMPORARY TABLE meal_merges ON COMMIT DROP AS
+        SELECT id AS duplicate_id,
+               min(id) OVER (PARTITION BY normalized_name) AS keeper_id
+        FROM meals
+        """
+    )
+    op.execute("DELETE FROM meal_merges WHERE duplicate_id = keeper_id")
+    op.execute(
+        """
+        UPDATE meal_plans SET meal_id = meal_merges.keeper_id
+        FROM meal_merges
+        WHERE meal_plans.meal_id = meal_merges.duplicate_id
+        """
+    )
+    op.execute("DELETE FROM meals USING meal_merges WHERE meals.id = meal_merges.duplicate_id")
+
+    op.alter_column('meals', 'normalized_name', nullable=False)
+    op.create_index('ix_meals_normalized_name', 'meals', ['normalized_name'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema. Merged meals are not restored."""
+    op.drop_index('ix_meals_normalized_name', table_name='meals')
+    op.drop_column('meals', 'normalized_name')
@@ -0,0 +1,49 @@
+"""meal plan slots
+
+Makes (user_id, date, meal_type) unique and adds a (user_id, date) index
+for range reads. Where a slot was generated more than once, the most
+recent plan is kept.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-11-20 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        """
+        DELETE FROM meal_plans
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY user_id, date, meal_type ORDER BY id DESC
+                ) AS position
+                FROM meal_plans
+            ) ranked
+            WHERE position > 1
+        )
+        """
+    )
+    op.create_unique_constraint(
+        'uq_meal_plans_slot', 'meal_plans', ['user_id', 'date', 'meal_type'])
+    op.create_index('ix_meal_plans_user_id_date', 'meal_plans', ['user_id', 'date'])
+
+
+def downgrade() -> None:
+    """Downgrade schema. Removed duplicate plans are not restored."""
+    op.drop_index('ix_meal_plans_user_id_date', table_name='meal_plans')
+    op.drop_constraint('uq_meal_plans_slot', 'meal_plans', type_='unique')
@@ -0,0 +1,37 @@
+"""updated at
+
+Adds an updated_at column to users, meals, inventory and meal_plans.
+The read endpoints derive their ETags from it. Existing rows are stamped
+with the time of the migration.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-11-20 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ['users', 'meals', 'inventory', 'meal_plans']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        op.add_column(table, sa.Column(
+            'updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.drop_column(table, 'updated_at')
@@ -0,0 +1,46 @@
+"""pregeneration runs
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2025-11-20 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'pregeneration_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('start_date', sa.Date(), nullable=True),
+        sa.Column('end_date', sa.Date(), nullable=True),
+        sa.Column('users_total', sa.Integer(), nullable=True),
+        sa.Column('users_done', sa.Integer(), nullable=True),
+        sa.Column('users_failed', sa.Integer(), nullable=True),
+        sa.Column('plans_created', sa.Integer(), nullable=True),
+        sa.Column('slots_skipped', sa.Integer(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_pregeneration_runs_id', 'pregeneration_runs', ['id'])
+    op.create_index('ix_pregeneration_runs_status', 'pregeneration_runs', ['status'])
+    op.create_index('ix_pregeneration_runs_start_date', 'pregeneration_runs', ['start_date'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('pregeneration_runs')
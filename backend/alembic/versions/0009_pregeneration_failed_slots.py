@@ -0,0 +1,31 @@
+"""pregeneration failed slots
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2025-11-20 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, Sequence[str], None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('pregeneration_runs', sa.Column('slots_failed', sa.Integer(), nullable=True))
+    op.add_column('pregeneration_runs', sa.Column('failed_slots', sa.JSON(), nullable=True))
+    op.execute("UPDATE pregeneration_runs SET slots_failed = 0, failed_slots = '[]'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('pregeneration_runs', 'failed_slots')
+    op.drop_column('pregeneration_runs', 'slots_failed')
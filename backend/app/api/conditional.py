@@ -0,0 +1,42 @@
+import hashlib
+from typing import Optional
+from fastapi import Request, Response
+from sqlalchemy import Select, func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def rows_version(db: AsyncSession, statement: Select) -> str:
+    """
+    Fingerprint of the rows a statement selects, computed in the database.
+    Select only ids and updated_at columns so it stays cheap.
+    """
+    rows = statement.subquery()
+    row = func.concat_ws(":", *rows.c)
+    fingerprint = await db.scalar(
+        select(func.md5(func.string_agg(row, aggregate_order_by(literal_column("','"), row))))
+        .select_from(rows)
+    )
+    return fingerprint or "empty"
+
+
+def not_modified(request: Request, response: Response, version: str) -> Optional[Response]:
+    """
+    Set an ETag for the requested URL at this data version. Returns a 304
+    response to send instead when the client already has it.
+
+    The tag is weak because GZipMiddleware may compress the body after it
+    is set, and the gzip and identity bytes then share one tag.
+    """
+    key = f"{request.url.path}?{sorted(request.query_params.multi_items())}|{version}"
+    etag = f'W/"{hashlib.sha1(key.encode()).hexdigest()}"'
+    response.headers["ETag"] = etag
+    response.headers["Vary"] = "Accept-Encoding"
+
+    if_none_match = request.headers.get("if-none-match")
+    # If-None-Match uses weak comparison, so W/ is ignored on both sides
+    if if_none_match and (if_none_match.strip() == "*" or etag.removeprefix("W/") in {
+        tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+    }):
+        return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept-Encoding"})
+    return None
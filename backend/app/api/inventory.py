@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
+from app.api.conditional import not_modified, rows_version
 from app.database import get_db
 from app.models.inventory import InventoryItem as InventoryModel
 from app.schemas.inventory import InventoryItem, InventoryItemCreate
@@ -9,33 +11,39 @@ router = APIRouter()
 
 
 @router.post("/", response_model=InventoryItem)
-def create_user(meal: InventoryItemCreate, db: Session = Depends(get_db)):
+async def create_user(meal: InventoryItemCreate, db: AsyncSession = Depends(get_db)):
     db_user = InventoryModel(**meal.dict())
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 
 @router.get("/", response_model=List[InventoryItem])
-def get_users(db: Session = Depends(get_db)):
-    return db.query(InventoryModel).all()
+async def get_users(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    version = await rows_version(db, select(InventoryModel.id, InventoryModel.updated_at))
+    cached = not_modified(request, response, version)
+    if cached:
+        return cached
+    return (await db.execute(select(InventoryModel))).scalars().all()
 
 
 @router.get("/{user_id}", response_model=InventoryItem)
-def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(InventoryModel).filter(
-        InventoryModel.id == user_id).first()
+async def get_user(user_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    user = await db.get(InventoryModel, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="InventoryItem not found")
+    cached = not_modified(request, response, str(user.updated_at))
+    if cached:
+        return cached
     return user
 
 
 @router.delete("/{id}")
-def delete_inventory_item(id: int, db: Session = Depends(get_db)):
-    item = db.query(InventoryModel).filter(InventoryModel.id == id).first()
+async def delete_inventory_item(id: int, db: AsyncSession = Depends(get_db)):
+    item = await db.get(InventoryModel, id)
     if not item:
         raise HTTPException(status_code=404, detail="InventoryItem not found")
-    db.delete(item)
-    db.commit()
+    await db.delete(item)
+    await db.commit()
     return {"detail": "InventoryItem deleted successfully"}
@@ -1,11 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+import json
+from itertools import groupby
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import case, delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from typing import List, Optional
 from datetime import date
-from app.database import get_db
+from app.api.conditional import not_modified, rows_version
+from app.config import get_settings
+from app.database import SessionLocal, get_db
+from app.models.generation_job import GenerationJob as GenerationJobModel
+from app.models.meal import Meal as MealModel
 from app.models.meal_plan import MealPlan as MealPlanModel
-from app.schemas.meal_plan import MealPlan
-from app.services.meal_generator import MealGeneratorService
+from app.models.user import User as UserModel
+from app.schemas.generation_job import GenerationJob
+from app.schemas.meal import Meal
+from app.schemas.meal_plan import DailyMealPlans, MealPlan, MealPlanBulkEatenOutside, MealPlanWithDetails
+from app.services.generation_queue import generation_queue
+from app.services.meal_history import meal_history_cache
+from app.services.meal_generator import MealGeneratorService, MEAL_TYPES
+from app.services.single_flight import generation_flights
+
+settings = get_settings()
 
 router = APIRouter()
 
@@ -14,12 +31,19 @@ router = APIRouter()
 async def generate_meal_plan(
     user_id: int,
     target_date: date,
-    db: Session = Depends(get_db)
+    bypass_cache: bool = False,
+    skip_filled: bool = False
 ):
-    """Generate daily meal plan for a user"""
-    generator = MealGeneratorService(db)
+    """Generate daily meal plan for a user, replacing or keeping already planned meals"""
+    async def generate():
+        # Shared by coalesced requests, so it doesn't use any one request's session
+        async with SessionLocal() as generator_db:
+            return await MealGeneratorService(generator_db).generate_daily_meals(
+                user_id, target_date, use_cache=not bypass_cache, skip_filled=skip_filled)
+
     try:
-        meal_plans = await generator.generate_daily_meals(user_id, target_date)
+        meal_plans = await generation_flights.do(
+            ("daily", user_id, target_date, tuple(MEAL_TYPES), bypass_cache, skip_filled), generate)
         return {"message": "Meal plan generated", "plans": len(meal_plans)}
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -28,44 +52,334 @@ async def generate_meal_plan(
             status_code=500, detail=f"Error generating meals: {str(e)}")
 
 
+@router.post("/generate/{user_id}/stream")
+async def stream_meal_plan(
+    user_id: int,
+    target_date: date,
+    bypass_cache: bool = False,
+    skip_filled: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """Generate daily meal plan for a user, streaming each meal as Server-Sent Events"""
+    if not await db.get(UserModel, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+
+    async def generate_events():
+        # The stream outlives the request's dependencies, so it gets its own session
+        async with SessionLocal() as stream_db:
+            generator = MealGeneratorService(stream_db)
+            async for event in generator.stream_daily_meals(
+                user_id, target_date, use_cache=not bypass_cache, skip_filled=skip_filled
+            ):
+                yield event
+
+    async def event_stream():
+        # A duplicate request joins the stream in flight and replays it from the start
+        events = generation_flights.stream(
+            ("stream", user_id, target_date, tuple(MEAL_TYPES), bypass_cache, skip_filled),
+            generate_events)
+        try:
+            async for kind, meal_type, payload in events:
+                if kind == "meal":
+                    data = {
+                        "meal_type": meal_type,
+                        "plan": MealPlan.model_validate(payload).model_dump(mode="json"),
+                        "meal": Meal.model_validate(payload.meal).model_dump(mode="json"),
+                    }
+                else:
+                    data = {"meal_type": meal_type, "text": payload}
+                yield _sse_event(kind, data)
+            yield _sse_event("done", {"message": "Meal plan generated"})
+        except Exception as e:
+            yield _sse_event("error", {"detail": f"Error generating meals: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/generate-range/{user_id}")
+async def generate_meal_plan_range(
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    meal_types: Optional[List[str]] = Query(None),
+    bypass_cache: bool = False,
+    skip_filled: bool = False
+):
+    """Generate meal plans for every day in a date range"""
+    meal_types = _validate_generation_range(start_date, end_date, meal_types) or MEAL_TYPES
+
+    async def generate():
+        async with SessionLocal() as generator_db:
+            return await MealGeneratorService(generator_db).generate_meal_plans(
+                user_id, start_date, end_date, meal_types,
+                use_cache=not bypass_cache, skip_filled=skip_filled)
+
+    try:
+        meal_plans = await generation_flights.do(
+            ("range", user_id, start_date, end_date, tuple(meal_types), bypass_cache, skip_filled),
+            generate)
+        return {"message": "Meal plans generated", "plans": len(meal_plans)}
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error generating meals: {str(e)}")
+
+
+@router.post("/optimize/{user_id}")
+async def optimize_meal_plan(
+    user_id: int,
+    start_date: date,
+    end_date: Optional[date] = None,
+    meal_types: Optional[List[str]] = Query(None),
+    llm_fallback: bool = True,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Plan a date range from stored meals to best fit protein and fiber
+    targets. Slots no stored meal fits are generated by the LLM unless
+    llm_fallback=false.
+    """
+    end_date = end_date or start_date
+    meal_types = _validate_generation_range(start_date, end_date, meal_types)
+
+    generator = MealGeneratorService(db)
+    try:
+        meal_plans, unfilled = await generator.plan_from_library(
+            user_id, start_date, end_date, meal_types, llm_fallback=llm_fallback)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    return {
+        "message": "Meal plans optimized",
+        "plans": len(meal_plans),
+        "unfilled": [
+            {"date": str(slot_date), "meal_type": meal_type}
+            for slot_date, meal_type in unfilled
+        ],
+    }
+
+
+@router.post("/jobs/{user_id}", response_model=GenerationJob)
+async def submit_generation_job(
+    user_id: int,
+    start_date: date,
+    end_date: Optional[date] = None,
+    meal_types: Optional[List[str]] = Query(None),
+    bypass_cache: bool = False,
+    skip_filled: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """Queue meal generation for a date range and return the job immediately"""
+    end_date = end_date or start_date
+    meal_types = _validate_generation_range(start_date, end_date, meal_types)
+
+    if not await db.get(UserModel, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return await generation_queue.submit(
+        db,
+        user_id,
+        start_date,
+        end_date,
+        meal_types or MEAL_TYPES,
+        use_cache=not bypass_cache,
+        skip_filled=skip_filled
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=GenerationJob)
+async def get_generation_job(job_id: str, db: AsyncSession = Depends(get_db)):
+    """Get status and per-meal progress of a generation job"""
+    job = await db.get(GenerationJobModel, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Generation job not found")
+    return job
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=GenerationJob)
+async def cancel_generation_job(job_id: str, db: AsyncSession = Depends(get_db)):
+    """Cancel a queued or running generation job"""
+    job = await db.get(GenerationJobModel, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Generation job not found")
+    return await generation_queue.cancel(db, job)
+
+
 @router.get("/user/{user_id}", response_model=List[MealPlan])
-def get_user_meal_plans(
+async def get_user_meal_plans(
     user_id: int,
     start_date: date,
     end_date: date,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
 ):
     """Get meal plans for a user within date range"""
-    plans = (
-        db.query(MealPlanModel)
-        .filter(MealPlanModel.user_id == user_id)
-        .filter(MealPlanModel.date >= start_date)
-        .filter(MealPlanModel.date <= end_date)
-        .all()
+    version = await rows_version(
+        db,
+        select(MealPlanModel.id, MealPlanModel.updated_at)
+        .where(MealPlanModel.user_id == user_id)
+        .where(MealPlanModel.date >= start_date)
+        .where(MealPlanModel.date <= end_date)
+    )
+    cached = not_modified(request, response, version)
+    if cached:
+        return cached
+
+    plans = await db.execute(
+        select(MealPlanModel)
+        .where(MealPlanModel.user_id == user_id)
+        .where(MealPlanModel.date >= start_date)
+        .where(MealPlanModel.date <= end_date)
     )
-    return plans
+    return plans.scalars().all()
+
+
+@router.get("/user/{user_id}/details", response_model=List[DailyMealPlans])
+async def get_user_meal_plan_details(
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get meal plans with their meals for a date range, grouped by date"""
+    # The response also carries each plan's meal and the user's name
+    version = await rows_version(
+        db,
+        select(MealPlanModel.id, MealPlanModel.updated_at, MealModel.updated_at, UserModel.updated_at)
+        .outerjoin(MealModel, MealPlanModel.meal_id == MealModel.id)
+        .join(UserModel, MealPlanModel.user_id == UserModel.id)
+        .where(MealPlanModel.user_id == user_id)
+        .where(MealPlanModel.date >= start_date)
+        .where(MealPlanModel.date <= end_date)
+    )
+    cached = not_modified(request, response, version)
+    if cached:
+        return cached
+
+    meal_type_order = case(
+        {meal_type: position for position, meal_type in enumerate(MEAL_TYPES)},
+        value=MealPlanModel.meal_type,
+        else_=len(MEAL_TYPES)
+    )
+    result = await db.execute(
+        select(MealPlanModel)
+        .options(joinedload(MealPlanModel.meal), joinedload(MealPlanModel.user))
+        .where(MealPlanModel.user_id == user_id)
+        .where(MealPlanModel.date >= start_date)
+        .where(MealPlanModel.date <= end_date)
+        .order_by(MealPlanModel.date, meal_type_order, MealPlanModel.id)
+    )
+    plans = result.scalars().all()
+
+    return [
+        DailyMealPlans(
+            date=plan_date,
+            plans=[
+                MealPlanWithDetails(
+                    **MealPlan.model_validate(plan).model_dump(),
+                    meal=Meal.model_validate(plan.meal) if plan.meal else None,
+                    user_name=plan.user.name
+                )
+                for plan in day_plans
+            ]
+        )
+        for plan_date, day_plans in groupby(plans, key=lambda plan: plan.date)
+    ]
+
+
+@router.delete("/user/{user_id}")
+async def delete_user_meal_plans(
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    meal_types: Optional[List[str]] = Query(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """Delete a user's meal plans within a date range, optionally only some meal types"""
+    statement = (
+        delete(MealPlanModel)
+        .where(MealPlanModel.user_id == user_id)
+        .where(MealPlanModel.date >= start_date)
+        .where(MealPlanModel.date <= end_date)
+    )
+    if meal_types:
+        statement = statement.where(MealPlanModel.meal_type.in_(meal_types))
+
+    result = await db.execute(statement.execution_options(synchronize_session=False))
+    await db.commit()
+    meal_history_cache.invalidate(user_id)
+    return {"message": "Meal plans deleted", "deleted": result.rowcount}
+
+
+@router.patch("/eaten-outside")
+async def bulk_mark_eaten_outside(update_request: MealPlanBulkEatenOutside, db: AsyncSession = Depends(get_db)):
+    """Set the eaten outside flag on several meal plans at once"""
+    if not update_request.ids:
+        return {"message": "Meal plans updated", "updated": 0}
+
+    result = await db.execute(
+        update(MealPlanModel)
+        .where(MealPlanModel.id.in_(update_request.ids))
+        .values(eaten_outside=update_request.eaten_outside)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return {"message": "Meal plans updated", "updated": result.rowcount}
 
 
 @router.patch("/{plan_id}/eaten-outside", response_model=MealPlan)
-def mark_eaten_outside(plan_id: int, eaten_outside: bool, db: Session = Depends(get_db)):
+async def mark_eaten_outside(plan_id: int, eaten_outside: bool, db: AsyncSession = Depends(get_db)):
     """Toggle eaten outside flag"""
-    plan = db.query(MealPlanModel).filter(MealPlanModel.id == plan_id).first()
+    plan = await db.get(MealPlanModel, plan_id)
     if not plan:
         raise HTTPException(status_code=404, detail="Meal plan not found")
 
     plan.eaten_outside = eaten_outside
-    db.commit()
-    db.refresh(plan)
+    await db.commit()
+    await db.refresh(plan)
     return plan
 
 
 @router.delete("/{id}")
-def delete_meal_plan(id: int, db: Session = Depends(get_db)):
+async def delete_meal_plan(id: int, db: AsyncSession = Depends(get_db)):
     """Delete a meal plan by ID"""
-    plan = db.query(MealPlanModel).filter(MealPlanModel.id == id).first()
+    plan = await db.get(MealPlanModel, id)
     if not plan:
         raise HTTPException(status_code=404, detail="Meal plan not found")
 
-    db.delete(plan)
-    db.commit()
+    await db.delete(plan)
+    await db.commit()
+    meal_history_cache.invalidate(plan.user_id)
     return {"message": "Meal plan deleted"}
+
+
+def _validate_generation_range(
+    start_date: date,
+    end_date: date,
+    meal_types: Optional[List[str]]
+) -> Optional[List[str]]:
+    """Reject bad ranges and meal types; return the meal types without repeats, in order"""
+    if end_date < start_date:
+        raise HTTPException(
+            status_code=400, detail="end_date must not be before start_date")
+    if (end_date - start_date).days >= settings.max_generation_days:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot generate more than {settings.max_generation_days} days at once")
+    if meal_types and any(meal_type not in MEAL_TYPES for meal_type in meal_types):
+        raise HTTPException(
+            status_code=400, detail=f"meal_types must be among {MEAL_TYPES}")
+    # One slot per meal type, or the upsert would write the same row twice
+    return list(dict.fromkeys(meal_types)) if meal_types else meal_types
+
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -1,30 +1,173 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import Float, case, cast, distinct, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+from app.api.conditional import not_modified, rows_version
 from app.database import get_db
+from app.models.inventory import InventoryItem as InventoryModel
 from app.models.meal import Meal as MealModel
-from app.schemas.meal import Meal, MealCreate
+from app.models.meal_ingredient import MealIngredient
+from app.schemas.meal import Meal, MealCreate, MealSearchResult
+from app.services.ingredients import build_meal_ingredients, canonical_name
 
 router = APIRouter()
 
 
 @router.post("/", response_model=Meal)
-def create_user(meal: MealCreate, db: Session = Depends(get_db)):
+async def create_user(meal: MealCreate, db: AsyncSession = Depends(get_db)):
     db_user = MealModel(**meal.dict())
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    try:
+        await db.flush()
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="A meal with this name already exists")
+    db.add_all(build_meal_ingredients(db_user.id, db_user.ingredients))
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 
-@router.get("/", response_model=List[Meal])
-def get_users(db: Session = Depends(get_db)):
-    return db.query(MealModel).all()
+@router.get("/")
+async def get_users(
+    request: Request,
+    response: Response,
+    after_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=200),
+    vegetarian: Optional[bool] = None,
+    cuisine_type: Optional[str] = None,
+    min_calories: Optional[float] = None,
+    max_calories: Optional[float] = None,
+    min_protein: Optional[float] = None,
+    max_protein: Optional[float] = None,
+    max_prep_time: Optional[int] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    List meals ordered by id, one page at a time.
+    When more meals exist the X-Next-Cursor header holds the after_id for the
+    next page. fields is a comma-separated list of columns to return.
+    """
+    if fields:
+        names = ["id"] + [name.strip() for name in fields.split(",") if name.strip() != "id"]
+        unknown = [name for name in names if name not in Meal.model_fields]
+        if unknown:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    else:
+        names = list(Meal.model_fields)
+
+    conditions = []
+    if after_id is not None:
+        conditions.append(MealModel.id > after_id)
+    if vegetarian is not None:
+        conditions.append(MealModel.is_vegetarian == vegetarian)
+    if cuisine_type:
+        conditions.append(func.lower(MealModel.cuisine_type) == cuisine_type.lower())
+    if min_calories is not None:
+        conditions.append(MealModel.calories >= min_calories)
+    if max_calories is not None:
+        conditions.append(MealModel.calories <= max_calories)
+    if min_protein is not None:
+        conditions.append(MealModel.protein >= min_protein)
+    if max_protein is not None:
+        conditions.append(MealModel.protein <= max_protein)
+    if max_prep_time is not None:
+        conditions.append(MealModel.prep_time_minutes <= max_prep_time)
+
+    # One extra row tells us whether another page exists
+    version = await rows_version(db, (
+        select(MealModel.id, MealModel.updated_at)
+        .where(*conditions)
+        .order_by(MealModel.id)
+        .limit(limit + 1)
+    ))
+    cached = not_modified(request, response, version)
+    if cached:
+        return cached
+
+    rows = (await db.execute(
+        select(*(getattr(MealModel, name) for name in names))
+        .where(*conditions)
+        .order_by(MealModel.id)
+        .limit(limit + 1)
+    )).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = str(rows[-1].id)
+
+    return [dict(row._mapping) for row in rows]
+
+
+@router.get("/search", response_model=List[MealSearchResult])
+async def search_meals(
+    ingredients: Optional[str] = None,
+    match: Literal["all", "any", "coverage"] = "coverage",
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Find meals by ingredient, using the inventory when no ingredients are given.
+    all: meals containing every ingredient, any: meals containing at least one,
+    coverage: meals ranked by the share of their ingredients that are available.
+    """
+    if ingredients is not None:
+        names = {canonical_name(name) for name in ingredients.split(",")} - {""}
+        if not names:
+            raise HTTPException(status_code=400, detail="No ingredient names given")
+        wanted = sorted(names)
+        wanted_count = len(names)
+    else:
+        wanted = select(func.lower(InventoryModel.item_name))
+        wanted_count = select(
+            func.count(distinct(func.lower(InventoryModel.item_name)))
+        ).scalar_subquery()
+
+    matched = func.count(distinct(
+        case((MealIngredient.name.in_(wanted), MealIngredient.name))))
+    total = func.count(MealIngredient.id)
+
+    stats = (
+        select(
+            MealIngredient.meal_id,
+            matched.label("matched"),
+            total.label("total"),
+            (cast(matched, Float) / total).label("coverage"),
+        )
+        .group_by(MealIngredient.meal_id)
+        .having(matched == wanted_count if match == "all" else matched > 0)
+        .subquery()
+    )
+
+    if match == "any":
+        ordering = (stats.c.matched.desc(), stats.c.coverage.desc())
+    else:
+        ordering = (stats.c.coverage.desc(), stats.c.matched.desc())
+
+    rows = (await db.execute(
+        select(MealModel, stats.c.matched, stats.c.total, stats.c.coverage)
+        .join(stats, stats.c.meal_id == MealModel.id)
+        .order_by(*ordering, MealModel.id)
+        .limit(limit)
+    )).all()
+    return [
+        MealSearchResult(
+            meal=Meal.model_validate(meal),
+            matched_ingredients=matched_count,
+            total_ingredients=total_count,
+            coverage=coverage,
+        )
+        for meal, matched_count, total_count, coverage in rows
+    ]
 
 
 @router.get("/{user_id}", response_model=Meal)
-def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(MealModel).filter(MealModel.id == user_id).first()
+async def get_user(user_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    user = await db.get(MealModel, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Meal not found")
+    cached = not_modified(request, response, str(user.updated_at))
+    if cached:
+        return cached
     return user
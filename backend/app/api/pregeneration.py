@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from app.database import get_db
+from app.models.pregeneration_run import PregenerationRun as PregenerationRunModel
+from app.schemas.pregeneration_run import PregenerationRun
+from app.services.pregeneration import pregeneration_scheduler
+
+router = APIRouter()
+
+
+@router.get("/runs", response_model=List[PregenerationRun])
+async def get_pregeneration_runs(limit: int = Query(20, ge=1, le=100), db: AsyncSession = Depends(get_db)):
+    """List the most recent scheduled pregeneration runs"""
+    runs = await db.execute(
+        select(PregenerationRunModel)
+        .order_by(PregenerationRunModel.id.desc())
+        .limit(limit)
+    )
+    return runs.scalars().all()
+
+
+@router.get("/runs/{run_id}", response_model=PregenerationRun)
+async def get_pregeneration_run(run_id: int, db: AsyncSession = Depends(get_db)):
+    run = await db.get(PregenerationRunModel, run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Pregeneration run not found")
+    return run
+
+
+@router.post("/runs", response_model=PregenerationRun)
+async def trigger_pregeneration_run():
+    """Start a pregeneration run now, regardless of the off-peak window"""
+    try:
+        return await pregeneration_scheduler.trigger()
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
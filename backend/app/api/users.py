@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
+from app.api.conditional import not_modified, rows_version
 from app.database import get_db
 from app.models.user import User as UserModel
 from app.schemas.user import User, UserCreate
@@ -9,22 +11,29 @@ router = APIRouter()
 
 
 @router.post("/", response_model=User)
-def create_user(user: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     db_user = UserModel(**user.dict())
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 
 @router.get("/", response_model=List[User])
-def get_users(db: Session = Depends(get_db)):
-    return db.query(UserModel).all()
+async def get_users(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    version = await rows_version(db, select(UserModel.id, UserModel.updated_at))
+    cached = not_modified(request, response, version)
+    if cached:
+        return cached
+    return (await db.execute(select(UserModel))).scalars().all()
 
 
 @router.get("/{user_id}", response_model=User)
-def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(UserModel).filter(UserModel.id == user_id).first()
+async def get_user(user_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    user = await db.get(UserModel, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    cached = not_modified(request, response, str(user.updated_at))
+    if cached:
+        return cached
     return user
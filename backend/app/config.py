@@ -1,7 +1,122 @@
-import yaml
+from functools import lru_cache
+from typing import Tuple, Type
+from pydantic import Field
+from pydantic_settings import (
+    BaseSettings,
+    PydanticBaseSettingsSource,
+    SettingsConfigDict,
+    YamlConfigSettingsSource,
+)
 
 
-def get_settings():
-    with open('config.yml', 'r') as file:
-        config = yaml.safe_load(file)
-    return config
\ No newline at end of file
+class Settings(BaseSettings):
+    """
+    Application settings read from config.yml. Any key can be overridden by
+    an environment variable of the same name, e.g. DB_HOST or USE_OLLAMA.
+    """
+
+    model_config = SettingsConfigDict(
+        yaml_file='config.yml',
+        env_file='.env',
+        extra='ignore',
+    )
+
+    db_user: str
+    db_password: str
+    db_name: str
+    db_host: str
+    db_port: int = Field(gt=0, le=65535)
+    db_pool_size: int = Field(gt=0)
+    db_max_overflow: int = Field(ge=0)
+    db_pool_timeout: float = Field(gt=0)
+    db_pool_recycle: int
+    db_pool_pre_ping: bool
+
+    ollama_host: str
+    ollama_model: str
+    api_title: str
+    api_version: str
+    gzip_minimum_size: int = Field(ge=0)
+    use_ollama: bool
+    openai_base_url: str
+    nvidia_nim_model: str
+
+    llm_max_concurrency: int = Field(gt=0)
+    llm_timeout_seconds: float = Field(gt=0)
+    llm_connect_timeout_seconds: float = Field(gt=0)
+    llm_max_connections: int = Field(gt=0)
+    llm_max_keepalive_connections: int = Field(ge=0)
+    llm_keepalive_expiry_seconds: float = Field(ge=0)
+
+    # Per-backend call timeouts; hedging sends a slow call to the other backend too
+    ollama_timeout_seconds: float = Field(gt=0)
+    nim_timeout_seconds: float = Field(gt=0)
+    llm_hedge_enabled: bool
+    llm_hedge_percentile: float = Field(gt=0, le=100)
+    llm_hedge_min_delay_seconds: float = Field(ge=0)
+    llm_hedge_latency_window: int = Field(gt=0)
+    llm_breaker_failure_threshold: int = Field(gt=0)
+    llm_breaker_cooldown_seconds: float = Field(gt=0)
+
+    llm_cache_enabled: bool
+    llm_cache_path: str
+    llm_cache_max_entries: int = Field(gt=0)
+    llm_cache_ttl_seconds: int = Field(gt=0)
+
+    meal_history_cache_max_users: int = Field(gt=0)
+    meal_history_cache_ttl_seconds: int = Field(gt=0)
+
+    meal_pool_enabled: bool
+    meal_pool_size: int = Field(gt=0)
+    meal_pool_low_water: int = Field(ge=0)
+    meal_pool_protein_bucket_size: int = Field(gt=0)
+    meal_pool_fiber_bucket_size: int = Field(gt=0)
+    meal_pool_max_keys: int = Field(gt=0)
+    meal_pool_prewarm: bool
+    meal_pool_refill_concurrency: int = Field(gt=0)
+
+    range_generation_workers: int = Field(gt=0)
+    max_generation_days: int = Field(gt=0)
+    generation_workers: int = Field(gt=0)
+
+    # Off-peak window in local hours; start > end wraps past midnight
+    pregeneration_enabled: bool
+    pregeneration_start_hour: int = Field(ge=0, le=23)
+    pregeneration_end_hour: int = Field(ge=0, le=23)
+    pregeneration_days_ahead: int = Field(gt=0)
+    pregeneration_max_concurrency: int = Field(gt=0)
+    pregeneration_check_interval_seconds: int = Field(gt=0)
+
+    meal_retrieval_enabled: bool
+    meal_retrieval_threshold: float = Field(ge=0, le=1)
+    optimizer_candidates_per_slot: int = Field(gt=0)
+    optimizer_min_inventory_coverage: float = Field(ge=0, le=1)
+
+    fake_llm_enabled: bool = False
+    fake_llm_seed: int = 0
+    fake_llm_latency_median_ms: float = Field(800, ge=0)
+    fake_llm_latency_sigma: float = Field(0.5, ge=0)
+    fake_llm_failure_rate: float = Field(0.0, ge=0, le=1)
+    fake_llm_malformed_rate: float = Field(0.0, ge=0, le=1)
+
+    @classmethod
+    def settings_customise_sources(
+        cls,
+        settings_cls: Type[BaseSettings],
+        init_settings: PydanticBaseSettingsSource,
+        env_settings: PydanticBaseSettingsSource,
+        dotenv_settings: PydanticBaseSettingsSource,
+        file_secret_settings: PydanticBaseSettingsSource,
+    ) -> Tuple[PydanticBaseSettingsSource, ...]:
+        # Earlier sources win, so the environment overrides config.yml
+        return (
+            init_settings,
+            env_settings,
+            dotenv_settings,
+            YamlConfigSettingsSource(settings_cls),
+        )
+
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
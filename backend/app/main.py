@@ -1,13 +1,52 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from sqlalchemy import event
 from app.config import get_settings
-from app.api import meals, inventory, meal_plans, users
+from app.database import engine
+from app.api import meals, inventory, meal_plans, pregeneration, users
+from app.services.generation_queue import generation_queue
+from app.services.llm_cache import llm_cache
+from app.services.llm_clients import llm_clients
+from app.services.llm_service import llm_router
+from app.services.meal_history import meal_history_cache
+from app.services.meal_generator import MEAL_TYPES
+from app.services.meal_pool import meal_pool
+from app.services.meal_retriever import retrieval_stats
+from app.services.pregeneration import pregeneration_scheduler
+from app.services.single_flight import generation_flights
+from app.services.metrics import (
+    HTTP_REQUEST_DB_QUERIES,
+    HTTP_REQUEST_SECONDS,
+    count_query,
+    start_request_query_count,
+)
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    llm_clients.start()
+    await generation_queue.start()
+    await pregeneration_scheduler.start()
+    await meal_pool.prewarm(MEAL_TYPES)
+    yield
+    await pregeneration_scheduler.stop()
+    await generation_queue.stop()
+    await meal_pool.stop()
+    await llm_clients.close()
+
+
 app = FastAPI(
-    title=settings['api_title'],
-    version=settings['api_version']
+    title=settings.api_title,
+    version=settings.api_version,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware for Streamlit
@@ -17,7 +56,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
+# Event streams are left uncompressed so tokens are not buffered
+app.add_middleware(GZipMiddleware, minimum_size=settings.gzip_minimum_size)
+
+event.listen(engine.sync_engine, "before_cursor_execute", count_query)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    queries = start_request_query_count()
+    started = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template so per-id paths share one series
+    route = request.scope.get("route")
+    path = route.path if route else "unmatched"
+    HTTP_REQUEST_SECONDS.labels(request.method, path, response.status_code).observe(
+        time.perf_counter() - started)
+    HTTP_REQUEST_DB_QUERIES.labels(request.method, path).observe(queries[0])
+    return response
+
 
 # Include routers
 app.include_router(users.router, prefix="/api/users", tags=["users"])
@@ -26,13 +85,32 @@ app.include_router(
     inventory.router, prefix="/api/inventory", tags=["inventory"])
 app.include_router(meal_plans.router,
                    prefix="/api/meal-plans", tags=["meal-plans"])
+app.include_router(pregeneration.router,
+                   prefix="/api/pregeneration", tags=["pregeneration"])
 
 
 @app.get("/")
 def root():
-    return {"message": "Meal Planner API", "version": settings['api_version']}
+    return {"message": "Meal Planner API", "version": settings.api_version}
 
 
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/stats")
+def stats():
+    return {
+        "llm_cache": llm_cache.stats(),
+        "llm_backends": llm_router.as_dict(),
+        "meal_retrieval": retrieval_stats.as_dict(),
+        "meal_history": meal_history_cache.as_dict(),
+        "meal_pool": meal_pool.as_dict(),
+        "generation_coalescing": generation_flights.as_dict(),
+    }
@@ -0,0 +1,25 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Date, Boolean, DateTime, Text, JSON, ForeignKey, false
+from app.database import Base
+
+
+class GenerationJob(Base):
+    __tablename__ = "generation_jobs"
+
+    id = Column(String, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    start_date = Column(Date)
+    end_date = Column(Date)
+    meal_types = Column(JSON)
+    use_cache = Column(Boolean, default=True)
+    skip_filled = Column(Boolean, nullable=False, default=False, server_default=false())
+
+    status = Column(String, index=True, default="queued")  # queued, running, done, failed, cancelled
+    # One entry per slot: {"date", "meal_type", "status", "started_at", "finished_at"}
+    progress = Column(JSON, default=list)
+    error = Column(Text, nullable=True)
+    plans_created = Column(Integer, default=0)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
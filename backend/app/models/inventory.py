@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, DateTime, func
 from app.database import Base
 
 
@@ -9,3 +9,5 @@ class InventoryItem(Base):
     item_name = Column(String, unique=True, index=True)
     quantity = Column(Integer, default=0)
     unit = Column(String, default="units")
+
+    updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
@@ -1,5 +1,10 @@
-from sqlalchemy import Column, Integer, String, Float, Text, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Float, Text, JSON, Boolean, DateTime, func
 from app.database import Base
+from app.services.ingredients import canonical_name
+
+
+def _normalized_name(context) -> str:
+    return canonical_name(context.get_current_parameters()["name"])
 
 
 class Meal(Base):
@@ -7,6 +12,8 @@ class Meal(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
+    # Case and whitespace variants of a name are the same meal
+    normalized_name = Column(String, nullable=False, unique=True, index=True, default=_normalized_name)
     description = Column(Text)
     cuisine_type = Column(String)
     is_vegetarian = Column(Boolean, default=False)
@@ -24,3 +31,5 @@ class Meal(Base):
     # Optional recipe instructions
     instructions = Column(Text, nullable=True)
     prep_time_minutes = Column(Integer, nullable=True)
+
+    updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index
+from app.database import Base
+
+
+class MealIngredient(Base):
+    __tablename__ = "meal_ingredients"
+
+    id = Column(Integer, primary_key=True, index=True)
+    meal_id = Column(Integer, ForeignKey("meals.id", ondelete="CASCADE"), nullable=False, index=True)
+    name = Column(String, nullable=False)  # canonical: lower-cased, single-spaced
+    quantity = Column(Float, nullable=True)  # None when the quantity isn't numeric, e.g. "to taste"
+    unit = Column(String, nullable=True)
+
+    __table_args__ = (
+        # Serves ingredient lookups and lets per-meal match counts come from the index
+        Index("ix_meal_ingredients_name_meal_id", "name", "meal_id"),
+    )
@@ -1,10 +1,15 @@
-from sqlalchemy import Column, Integer, String, Date, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, ForeignKey, Index, UniqueConstraint, func
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 
 class MealPlan(Base):
     __tablename__ = "meal_plans"
+    __table_args__ = (
+        # One meal per slot; regenerating a slot replaces its meal
+        UniqueConstraint("user_id", "date", "meal_type", name="uq_meal_plans_slot"),
+        Index("ix_meal_plans_user_id_date", "user_id", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -12,6 +17,7 @@ class MealPlan(Base):
     meal_type = Column(String)  # breakfast, lunch, dinner
     meal_id = Column(Integer, ForeignKey("meals.id"), nullable=True)
     eaten_outside = Column(Boolean, default=False)
+    updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
 
     user = relationship("User")
     meal = relationship("Meal")
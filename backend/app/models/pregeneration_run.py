@@ -0,0 +1,25 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, JSON
+from app.database import Base
+
+
+class PregenerationRun(Base):
+    __tablename__ = "pregeneration_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String, index=True, default="running")  # running, done, stopped, failed
+    start_date = Column(Date, index=True)
+    end_date = Column(Date)
+
+    users_total = Column(Integer, default=0)
+    users_done = Column(Integer, default=0)
+    users_failed = Column(Integer, default=0)
+    plans_created = Column(Integer, default=0)
+    slots_skipped = Column(Integer, default=0)
+    slots_failed = Column(Integer, default=0)
+    # Slots the LLM could not fill, left empty: {"user_id", "date", "meal_type"}
+    failed_slots = Column(JSON, default=list)
+    error = Column(Text, nullable=True)
+
+    started_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
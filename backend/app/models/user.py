@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, func
 from app.database import Base
 
 class User(Base):
@@ -8,4 +8,6 @@ class User(Base):
     name = Column(String, unique=True, index=True)
     is_vegetarian = Column(Boolean, default=False)
     protein_target = Column(Integer, default=80)
-    fiber_target = Column(Integer, default=30)
\ No newline at end of file
+    fiber_target = Column(Integer, default=30)
+
+    updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
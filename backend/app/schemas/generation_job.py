@@ -0,0 +1,30 @@
+from pydantic import BaseModel
+from datetime import date, datetime
+from typing import List, Optional
+
+
+class SlotProgress(BaseModel):
+    date: date
+    meal_type: str
+    status: str  # queued, running, done, skipped
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class GenerationJob(BaseModel):
+    id: str
+    user_id: int
+    start_date: date
+    end_date: date
+    meal_types: List[str]
+    skip_filled: bool = False
+    status: str  # queued, running, done, failed, cancelled
+    progress: List[SlotProgress] = []
+    error: Optional[str] = None
+    plans_created: int = 0
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
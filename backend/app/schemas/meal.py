@@ -26,3 +26,10 @@ class Meal(MealBase):
 
     class Config:
         from_attributes = True
+
+
+class MealSearchResult(BaseModel):
+    meal: Meal
+    matched_ingredients: int
+    total_ingredients: int
+    coverage: float  # share of the meal's ingredients that matched
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import date
-from typing import Optional
+from typing import List, Optional
 from app.schemas.meal import Meal
 
 
@@ -26,3 +26,13 @@ class MealPlan(MealPlanBase):
 class MealPlanWithDetails(MealPlan):
     meal: Optional[Meal] = None
     user_name: str
+
+
+class DailyMealPlans(BaseModel):
+    date: date
+    plans: List[MealPlanWithDetails]
+
+
+class MealPlanBulkEatenOutside(BaseModel):
+    ids: List[int]
+    eaten_outside: bool
@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from datetime import date, datetime
+from typing import List, Optional
+
+
+class FailedSlot(BaseModel):
+    user_id: int
+    date: date
+    meal_type: str
+
+
+class PregenerationRun(BaseModel):
+    id: int
+    status: str  # running, done, stopped, failed
+    start_date: date
+    end_date: date
+    users_total: int = 0
+    users_done: int = 0
+    users_failed: int = 0
+    plans_created: int = 0
+    slots_skipped: int = 0
+    slots_failed: int = 0
+    failed_slots: List[FailedSlot] = []
+    error: Optional[str] = None
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
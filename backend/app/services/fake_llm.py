@@ -0,0 +1,180 @@
+import asyncio
+import json
+import random
+import re
+from typing import AsyncIterator, Dict, List
+from app.config import get_settings
+
+settings = get_settings()
+
+CANNED_MEALS: List[Dict] = [
+    {
+        "name": "Chana Masala with Brown Rice",
+        "description": "Chickpeas simmered in a spiced tomato gravy",
+        "cuisine_type": "Indian",
+        "is_vegetarian": True,
+        "calories": 520,
+        "protein": 24,
+        "fiber": 14,
+        "carbs": 78,
+        "fats": 12,
+        "ingredients": [
+            {"name": "chickpeas", "quantity": "1 1/2", "unit": "cups"},
+            {"name": "brown rice", "quantity": "1", "unit": "cup"},
+            {"name": "tomato", "quantity": "2", "unit": "whole"},
+            {"name": "onion", "quantity": "1", "unit": "whole"}
+        ],
+        "instructions": "Cook rice, saute onion and tomato with spices, simmer chickpeas",
+        "prep_time_minutes": 35
+    },
+    {
+        "name": "Moong Dal Chilla",
+        "description": "Savoury lentil pancakes with mint chutney",
+        "cuisine_type": "Indian",
+        "is_vegetarian": True,
+        "calories": 380,
+        "protein": 22,
+        "fiber": 9,
+        "carbs": 48,
+        "fats": 10,
+        "ingredients": [
+            {"name": "moong dal", "quantity": "1", "unit": "cup"},
+            {"name": "spinach", "quantity": "1", "unit": "cup"},
+            {"name": "green chilli", "quantity": "1", "unit": "whole"}
+        ],
+        "instructions": "Soak and grind dal, fold in spinach, cook thin pancakes",
+        "prep_time_minutes": 25
+    },
+    {
+        "name": "Paneer Bhurji with Multigrain Roti",
+        "description": "Scrambled paneer with peppers and onions",
+        "cuisine_type": "Indian",
+        "is_vegetarian": True,
+        "calories": 560,
+        "protein": 30,
+        "fiber": 8,
+        "carbs": 42,
+        "fats": 28,
+        "ingredients": [
+            {"name": "paneer", "quantity": "200", "unit": "g"},
+            {"name": "bell pepper", "quantity": "1", "unit": "whole"},
+            {"name": "multigrain flour", "quantity": "1/2", "unit": "cup"}
+        ],
+        "instructions": "Crumble paneer into sauteed vegetables, serve with rotis",
+        "prep_time_minutes": 30
+    },
+    {
+        "name": "Rajma Quinoa Bowl",
+        "description": "Kidney bean curry over quinoa with cucumber raita",
+        "cuisine_type": "Indian",
+        "is_vegetarian": True,
+        "calories": 540,
+        "protein": 26,
+        "fiber": 16,
+        "carbs": 80,
+        "fats": 11,
+        "ingredients": [
+            {"name": "kidney beans", "quantity": "1", "unit": "cup"},
+            {"name": "quinoa", "quantity": "3/4", "unit": "cup"},
+            {"name": "yogurt", "quantity": "1/2", "unit": "cup"}
+        ],
+        "instructions": "Simmer beans in masala, cook quinoa, top with raita",
+        "prep_time_minutes": 40
+    },
+    {
+        "name": "Tandoori Chicken with Dal",
+        "description": "Yogurt marinated chicken with yellow lentils",
+        "cuisine_type": "Indian",
+        "is_vegetarian": False,
+        "calories": 610,
+        "protein": 48,
+        "fiber": 10,
+        "carbs": 45,
+        "fats": 22,
+        "ingredients": [
+            {"name": "chicken thigh", "quantity": "250", "unit": "g"},
+            {"name": "yogurt", "quantity": "1/2", "unit": "cup"},
+            {"name": "toor dal", "quantity": "3/4", "unit": "cup"}
+        ],
+        "instructions": "Marinate and roast chicken, pressure cook dal with tempering",
+        "prep_time_minutes": 45
+    },
+    {
+        "name": "Egg Bhurji with Sprouts Salad",
+        "description": "Spiced scrambled eggs with a sprouted moong salad",
+        "cuisine_type": "Indian",
+        "is_vegetarian": False,
+        "calories": 420,
+        "protein": 32,
+        "fiber": 9,
+        "carbs": 24,
+        "fats": 20,
+        "ingredients": [
+            {"name": "eggs", "quantity": "3", "unit": "whole"},
+            {"name": "moong sprouts", "quantity": "1", "unit": "cup"},
+            {"name": "onion", "quantity": "1", "unit": "whole"}
+        ],
+        "instructions": "Scramble eggs with onion and spices, toss sprouts with lemon",
+        "prep_time_minutes": 20
+    },
+]
+
+
+class FakeLLMClient:
+    """
+    Offline stand-in for the ollama AsyncClient used for benchmarking.
+    Replies are canned meals delivered after a random latency, with
+    configurable rates of failures and malformed JSON. A fixed seed makes
+    a run reproducible.
+    """
+
+    def __init__(self):
+        self._random = random.Random(settings.fake_llm_seed)
+        self._calls = 0
+
+    async def generate(self, model: str, prompt: str, format: str = "", stream: bool = False):
+        if stream:
+            return self._stream(prompt)
+
+        await asyncio.sleep(self._latency())
+        reply = self._reply(prompt)
+        return {"response": reply, **self._token_counts(prompt, reply)}
+
+    async def _stream(self, prompt: str) -> AsyncIterator[Dict]:
+        reply = self._reply(prompt)
+        chunks = [reply[start:start + 16] for start in range(0, len(reply), 16)]
+        # Spread the latency over the chunks the way tokens trickle in
+        delay = self._latency() / len(chunks)
+        for chunk in chunks[:-1]:
+            await asyncio.sleep(delay)
+            yield {"response": chunk}
+        await asyncio.sleep(delay)
+        yield {"response": chunks[-1], **self._token_counts(prompt, reply)}
+
+    def _latency(self) -> float:
+        return self._random.lognormvariate(0, settings.fake_llm_latency_sigma) \
+            * settings.fake_llm_latency_median_ms / 1000
+
+    def _token_counts(self, prompt: str, reply: str) -> Dict:
+        # About four characters per token, in the fields ollama reports
+        return {"prompt_eval_count": len(prompt) // 4, "eval_count": len(reply) // 4}
+
+    def _reply(self, prompt: str) -> str:
+        roll = self._random.random()
+        if roll < settings.fake_llm_failure_rate:
+            raise RuntimeError("Fake LLM failure")
+
+        self._calls += 1
+        vegetarian = "Diet: vegetarian" in prompt
+        candidates = [meal for meal in CANNED_MEALS if meal["is_vegetarian"] or not vegetarian]
+        meal = dict(self._random.choice(candidates))
+        # Distinct names so the meal library grows as it would with a real model
+        meal["name"] = f"{meal['name']} #{self._calls}"
+        match = re.search(r"Create a (\w+) meal", prompt)
+        if match:
+            meal["description"] = f"{meal['description']} for {match.group(1)}"
+
+        reply = json.dumps(meal)
+        if roll < settings.fake_llm_failure_rate + settings.fake_llm_malformed_rate:
+            return reply[:len(reply) // 2]
+        return reply
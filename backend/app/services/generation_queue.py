@@ -0,0 +1,290 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+from uuid import uuid4
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from app.config import get_settings
+from app.database import SessionLocal, engine
+from app.models.generation_job import GenerationJob
+from app.services.meal_generator import MealGeneratorService, MEAL_TYPES
+
+settings = get_settings()
+
+FINISHED_STATUSES = ("done", "failed", "cancelled")
+# First halves of the two-key advisory locks that serialize a user's
+# submits, and that the process running a job holds until it ends
+SUBMIT_LOCK_SPACE = 0x6A6F6273
+RUN_LOCK_SPACE = 0x72756E73
+
+
+class GenerationQueue:
+    """
+    In-process worker pool that runs meal generation jobs.
+    Jobs are persisted, so anything queued or running when the process
+    stops is picked up again on the next start.
+
+    Every worker process runs a queue. A job is claimed atomically, and its
+    process holds a Postgres advisory lock on it while it runs, so a running
+    job is only requeued once the process that had it is gone.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._worker_tasks: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        # Serializes a running job's progress and outcome writes with cancel()
+        self._job_locks: Dict[str, asyncio.Lock] = {}
+
+    async def start(self):
+        async with SessionLocal() as db:
+            pending = (await db.execute(
+                select(GenerationJob.id, GenerationJob.status)
+                .where(GenerationJob.status.in_(["queued", "running"]))
+                .order_by(GenerationJob.created_at)
+            )).all()
+
+        for job_id, status in pending:
+            if status == "running" and not await self._requeue_orphan(job_id):
+                continue
+            self._queue.put_nowait(job_id)
+
+        self._worker_tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+
+    async def stop(self):
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    async def submit(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        start_date: date,
+        end_date: date,
+        meal_types: List[str],
+        use_cache: bool = True,
+        skip_filled: bool = False
+    ) -> GenerationJob:
+        """
+        Persist and enqueue a job. A queued or running job for the same
+        request is returned instead, so a double-click doesn't generate twice.
+        """
+        # Held until commit, so concurrent submits in any process see each other's job
+        await db.execute(select(func.pg_advisory_xact_lock(SUBMIT_LOCK_SPACE, user_id)))
+        active = (await db.execute(
+            select(GenerationJob)
+            .where(
+                GenerationJob.user_id == user_id,
+                GenerationJob.start_date == start_date,
+                GenerationJob.end_date == end_date,
+                GenerationJob.use_cache == use_cache,
+                GenerationJob.skip_filled == skip_filled,
+                GenerationJob.status.in_(["queued", "running"]),
+            )
+            .order_by(GenerationJob.created_at)
+        )).scalars().all()
+        for job in active:
+            if job.meal_types == meal_types:
+                await db.commit()
+                return job
+
+        job = GenerationJob(
+            id=uuid4().hex,
+            user_id=user_id,
+            start_date=start_date,
+            end_date=end_date,
+            meal_types=meal_types,
+            use_cache=use_cache,
+            skip_filled=skip_filled,
+            status="queued",
+            progress=[],
+        )
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+        self._queue.put_nowait(job.id)
+        return job
+
+    async def cancel(self, db: AsyncSession, job: GenerationJob) -> GenerationJob:
+        lock = self._job_locks.get(job.id) or asyncio.Lock()
+        async with lock:
+            await db.refresh(job)
+            if job.status in FINISHED_STATUSES:
+                return job
+
+            # The work is over and the worker is about to record how it ended
+            task = self._running.get(job.id)
+            if task and task.done() and not task.cancelled():
+                return job
+
+            job.status = "cancelled"
+            job.finished_at = datetime.utcnow()
+            await db.commit()
+            await db.refresh(job)
+
+            if task:
+                task.cancel()
+            return job
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Generation job {job_id} crashed: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        lock = await self._try_lock(job_id)
+        # Another process is running it
+        if lock is None:
+            return
+        try:
+            async with SessionLocal() as db:
+                job = await db.get(GenerationJob, job_id)
+                # Cancelled while it was waiting in the queue, or run elsewhere
+                if not job or job.status != "queued":
+                    return
+
+                # Range workers report concurrently, and each update reads the last
+                # one. cancel() takes the same lock, so a job is never marked
+                # cancelled after its outcome is decided.
+                progress_lock = asyncio.Lock()
+                self._job_locks[job_id] = progress_lock
+                try:
+                    await self._execute(db, job, progress_lock)
+                finally:
+                    self._running.pop(job_id, None)
+                    self._job_locks.pop(job_id, None)
+        finally:
+            await self._unlock(lock, job_id)
+
+    async def _requeue_orphan(self, job_id: str) -> bool:
+        """Requeue a running job whose process is gone; False if one still has it"""
+        lock = await self._try_lock(job_id)
+        if lock is None:
+            return False
+        try:
+            async with SessionLocal() as db:
+                await db.execute(
+                    update(GenerationJob)
+                    .where(GenerationJob.id == job_id, GenerationJob.status == "running")
+                    .values(status="queued", progress=[])
+                )
+                await db.commit()
+        finally:
+            await self._unlock(lock, job_id)
+        return True
+
+    async def _try_lock(self, job_id: str) -> Optional[AsyncConnection]:
+        """
+        The connection holding the job's run lock, or None if another
+        process has it. The lock is released by _unlock(), or by Postgres if
+        the process dies.
+        """
+        connection = await engine.connect()
+        try:
+            acquired = await connection.scalar(
+                select(func.pg_try_advisory_lock(RUN_LOCK_SPACE, func.hashtext(job_id))))
+            # The lock belongs to the session, so no transaction is left open
+            await connection.commit()
+        except BaseException:
+            await connection.close()
+            raise
+        if not acquired:
+            await connection.close()
+            return None
+        return connection
+
+    async def _unlock(self, connection: AsyncConnection, job_id: str):
+        try:
+            await connection.execute(
+                select(func.pg_advisory_unlock(RUN_LOCK_SPACE, func.hashtext(job_id))))
+            await connection.commit()
+        finally:
+            await connection.close()
+
+    async def _execute(self, db: AsyncSession, job: GenerationJob, progress_lock: asyncio.Lock):
+        meal_types = job.meal_types or MEAL_TYPES
+
+        async def on_progress(target_date: date, meal_type: str, status: str):
+            now = datetime.utcnow().isoformat()
+            async with progress_lock:
+                progress = [dict(entry) for entry in job.progress]
+                for entry in progress:
+                    if entry["date"] == target_date.isoformat() and entry["meal_type"] == meal_type:
+                        entry["status"] = status
+                        entry["started_at" if status == "running" else "finished_at"] = now
+                # Reassign rather than mutate so the JSON column is marked dirty
+                job.progress = progress
+                await db.commit()
+
+        async with SessionLocal() as generator_db:
+            async with progress_lock:
+                # Claimed in one statement, so only one process can start it
+                claimed = await db.scalar(
+                    update(GenerationJob)
+                    .where(GenerationJob.id == job.id, GenerationJob.status == "queued")
+                    .values(
+                        status="running",
+                        started_at=datetime.utcnow(),
+                        progress=[
+                            {"date": (job.start_date + timedelta(days=offset)).isoformat(),
+                             "meal_type": meal_type, "status": "queued"}
+                            for offset in range((job.end_date - job.start_date).days + 1)
+                            for meal_type in meal_types
+                        ],
+                    )
+                    .returning(GenerationJob.id)
+                )
+                await db.commit()
+                if claimed is None:
+                    return
+                await db.refresh(job)
+
+                generator = MealGeneratorService(generator_db)
+                task = asyncio.create_task(generator.generate_meal_plans(
+                    job.user_id,
+                    job.start_date,
+                    job.end_date,
+                    meal_types,
+                    use_cache=job.use_cache,
+                    on_progress=on_progress,
+                    skip_filled=job.skip_filled
+                ))
+                self._running[job.id] = task
+
+            try:
+                meal_plans = await task
+            except asyncio.CancelledError:
+                # Shutting down: leave the job running so start() requeues it
+                if asyncio.current_task().cancelling():
+                    raise
+                return
+            except Exception as e:
+                status, error, plans_created = "failed", str(e), 0
+            else:
+                status, error, plans_created = "done", None, len(meal_plans)
+
+            async with progress_lock:
+                # Cancelled through another process, which can't stop the task
+                await db.refresh(job)
+                if job.status != "running":
+                    return
+                job.status = status
+                job.error = error
+                job.plans_created = plans_created
+                job.finished_at = datetime.utcnow()
+                await db.commit()
+
+
+generation_queue = GenerationQueue(workers=settings.generation_workers)
@@ -0,0 +1,51 @@
+import re
+from typing import Dict, List, Optional
+from app.models.meal_ingredient import MealIngredient
+
+
+def canonical_name(name: str) -> str:
+    """Lower-case and collapse whitespace so the same ingredient always matches"""
+    return re.sub(r"\s+", " ", name or "").strip().lower()
+
+
+def parse_quantity(quantity) -> Optional[float]:
+    """
+    Parse quantities like "2", "0.5", "1/2" or "1 1/2" into a number.
+    Ranges such as "2-3" use the lower bound; anything else is None.
+    """
+    if isinstance(quantity, (int, float)):
+        return float(quantity)
+
+    text = str(quantity or "").strip()
+    fraction = re.match(r"^(?:(\d+)\s+)?(\d+)/(\d+)", text)
+    if fraction:
+        whole, numerator, denominator = fraction.groups()
+        if int(denominator) == 0:
+            return None
+        return int(whole or 0) + int(numerator) / int(denominator)
+
+    number = re.match(r"^\d+(?:\.\d+)?", text)
+    return float(number.group()) if number else None
+
+
+def build_meal_ingredients(meal_id: int, ingredients: Optional[List[Dict]]) -> List[MealIngredient]:
+    """
+    Normalize a meal's JSON ingredient list into MealIngredient rows.
+    Entries that aren't objects with a string name, such as plain
+    "1 cup rice" strings from older replies, are skipped.
+    """
+    rows = []
+    for ingredient in ingredients or []:
+        if not isinstance(ingredient, dict) or not isinstance(ingredient.get("name"), str):
+            continue
+        name = canonical_name(ingredient["name"])
+        if not name:
+            continue
+        unit = ingredient.get("unit")
+        rows.append(MealIngredient(
+            meal_id=meal_id,
+            name=name,
+            quantity=parse_quantity(ingredient.get("quantity")),
+            unit=(canonical_name(unit) or None) if isinstance(unit, str) else None,
+        ))
+    return rows
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class LLMCache:
+    """
+    On-disk LRU cache of parsed LLM responses.
+    Entries are keyed on the normalized prompt plus the model name.
+    """
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_llm_cache_last_accessed "
+            "ON llm_cache (last_accessed)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(prompt: str, model: str) -> str:
+        """Hash the prompt with whitespace and case differences removed"""
+        normalized = re.sub(r"\s+", " ", prompt).strip().lower()
+        return hashlib.sha256(f"{model}\n{normalized}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self.get_many([key])
+
+    def get_many(self, keys: List[str]) -> Optional[Dict]:
+        """The first fresh entry among keys, counted as a single lookup"""
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                row = self._conn.execute(
+                    "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+
+                if row and now - row[1] <= self.ttl_seconds:
+                    self._conn.execute(
+                        "UPDATE llm_cache SET last_accessed = ? WHERE key = ?", (now, key))
+                    self._conn.commit()
+                    self.hits += 1
+                    return json.loads(row[0])
+
+                if row:
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Dict):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_accessed) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            # Evict least recently used entries beyond the size bound
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache ORDER BY last_accessed DESC "
+                "LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = self._conn.execute(
+                "SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+        }
+
+
+llm_cache = LLMCache(
+    settings.llm_cache_path,
+    max_entries=settings.llm_cache_max_entries,
+    ttl_seconds=settings.llm_cache_ttl_seconds
+)
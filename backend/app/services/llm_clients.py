@@ -0,0 +1,96 @@
+import os
+from typing import TYPE_CHECKING, Optional
+from app.config import get_settings
+from dotenv import load_dotenv
+
+# The SDKs are slow to import, so only the selected backend's is loaded,
+# and only once a client is first needed
+if TYPE_CHECKING:
+    import httpx
+    from ollama import AsyncClient
+    from openai import AsyncOpenAI
+
+settings = get_settings()
+load_dotenv()
+
+
+class LLMClients:
+    """
+    Process-wide model server clients. They share one set of connection
+    limits and keep connections alive between requests; the app lifespan
+    opens them at startup and closes them at shutdown.
+    """
+
+    def __init__(self):
+        self._ollama: Optional["AsyncClient"] = None
+        self._ollama_transport: Optional["httpx.AsyncHTTPTransport"] = None
+        self._openai: Optional["AsyncOpenAI"] = None
+
+    def start(self):
+        """Open the client for the configured backend"""
+        if settings.use_ollama or settings.fake_llm_enabled:
+            self.ollama
+        else:
+            self.openai
+
+    async def close(self):
+        if self._ollama_transport is not None:
+            await self._ollama_transport.aclose()
+        if self._openai is not None:
+            await self._openai.close()
+        self._ollama = None
+        self._ollama_transport = None
+        self._openai = None
+
+    @property
+    def ollama(self) -> "AsyncClient":
+        if self._ollama is None and settings.fake_llm_enabled:
+            from app.services.fake_llm import FakeLLMClient
+
+            self._ollama = FakeLLMClient()
+        if self._ollama is None:
+            import httpx
+            from ollama import AsyncClient
+
+            # The ollama client builds its own httpx client and has no close,
+            # so it is given a connection pool that is ours to close
+            self._ollama_transport = httpx.AsyncHTTPTransport(limits=self._limits())
+            self._ollama = AsyncClient(
+                host=settings.ollama_host,
+                timeout=self._timeout(),
+                transport=self._ollama_transport
+            )
+        return self._ollama
+
+    @property
+    def openai(self) -> "AsyncOpenAI":
+        if self._openai is None:
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+            self._openai = AsyncOpenAI(
+                api_key=os.getenv('NVIDIA_API_KEY'),
+                base_url=settings.openai_base_url,
+                http_client=DefaultAsyncHttpxClient(
+                    timeout=self._timeout(), limits=self._limits())
+            )
+        return self._openai
+
+    def _timeout(self) -> "httpx.Timeout":
+        import httpx
+
+        return httpx.Timeout(
+            settings.llm_timeout_seconds,
+            connect=settings.llm_connect_timeout_seconds
+        )
+
+    def _limits(self) -> "httpx.Limits":
+        import httpx
+
+        return httpx.Limits(
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_keepalive_connections,
+            keepalive_expiry=settings.llm_keepalive_expiry_seconds
+        )
+
+
+llm_clients = LLMClients()
@@ -0,0 +1,212 @@
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from app.services.metrics import (
+    LLM_BACKEND_FAILURES,
+    LLM_BACKEND_WINS,
+    LLM_CIRCUIT_OPEN,
+    LLM_HEDGES,
+    llm_span,
+)
+
+
+class BackendUnavailable(Exception):
+    """Every backend's circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls
+    for `cooldown_seconds`. After that a single trial call is let through:
+    success closes the circuit, failure opens it for another cool-down.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, cooldown_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.cooldown_seconds:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; a half-open circuit allows one at a time"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        LLM_CIRCUIT_OPEN.labels(self.name).set(0)
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial_in_flight or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            LLM_CIRCUIT_OPEN.labels(self.name).set(1)
+        self._trial_in_flight = False
+
+    def release(self):
+        """A call was abandoned without an outcome, e.g. a hedge that lost"""
+        self._trial_in_flight = False
+
+
+class Backend:
+    """
+    A model server the router can send prompts to. `limit` bounds the calls
+    in flight to it; waiting for a slot is not counted against the timeout.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        call: Callable[[str], Awaitable[object]],
+        timeout_seconds: float,
+        limit: asyncio.Semaphore
+    ):
+        self.name = name
+        self.call = call
+        self.timeout_seconds = timeout_seconds
+        self.limit = limit
+
+
+class LLMRouter:
+    """
+    Sends a prompt to the first backend and, if it has not answered within
+    the hedge delay, to the next one as well; the first good answer wins
+    and the other call is cancelled. A backend that fails or times out is
+    failed over immediately. The hedge delay follows a latency percentile
+    of the backend's recent successful calls.
+    """
+
+    def __init__(
+        self,
+        backends: List[Backend],
+        hedge_percentile: float,
+        hedge_min_delay_seconds: float,
+        latency_window: int,
+        failure_threshold: int,
+        cooldown_seconds: float
+    ):
+        self.backends = backends
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay_seconds = hedge_min_delay_seconds
+        self.breakers = {
+            backend.name: CircuitBreaker(backend.name, failure_threshold, cooldown_seconds)
+            for backend in backends
+        }
+        self._latencies: Dict[str, Deque[float]] = {
+            backend.name: deque(maxlen=latency_window) for backend in backends
+        }
+
+    def hedge_delay(self, backend: Backend) -> float:
+        latencies = sorted(self._latencies[backend.name])
+        if not latencies:
+            return self.hedge_min_delay_seconds
+        index = min(len(latencies) - 1, int(len(latencies) * self.hedge_percentile / 100))
+        return max(self.hedge_min_delay_seconds, latencies[index])
+
+    def first_available(self) -> Backend:
+        """The first backend whose circuit lets a call through, for calls that can't be hedged"""
+        for backend in self.backends:
+            if self.breakers[backend.name].allow():
+                return backend
+        raise BackendUnavailable("All LLM backends are unavailable")
+
+    async def complete(self, prompt: str) -> Tuple[str, object]:
+        """Return the name of the first backend to succeed for the prompt, and its result"""
+        waiting = list(self.backends)
+        pending: Dict[asyncio.Task, Backend] = {}
+        last_launched: Optional[Backend] = None
+        error: Optional[Exception] = None
+
+        def launch() -> Optional[Backend]:
+            while waiting:
+                backend = waiting.pop(0)
+                if self.breakers[backend.name].allow():
+                    pending[asyncio.create_task(self._attempt(backend, prompt))] = backend
+                    return backend
+            return None
+
+        last_launched = launch()
+        if last_launched is None:
+            raise BackendUnavailable("All LLM backends are unavailable")
+
+        try:
+            while pending:
+                timeout = self.hedge_delay(last_launched) if waiting else None
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedge = launch()
+                    if hedge:
+                        LLM_HEDGES.labels(hedge.name).inc()
+                        last_launched = hedge
+                    continue
+
+                for task in done:
+                    backend = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        error = e
+                        continue
+                    LLM_BACKEND_WINS.labels(backend.name).inc()
+                    return backend.name, result
+
+                if not pending:
+                    last_launched = launch()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _attempt(self, backend: Backend, prompt: str) -> object:
+        breaker = self.breakers[backend.name]
+        try:
+            # Queueing for a local slot isn't the backend being slow, so
+            # only the call itself is timed and sampled for the hedge delay
+            async with backend.limit:
+                started = time.perf_counter()
+                try:
+                    with llm_span(backend.name):
+                        result = await asyncio.wait_for(
+                            backend.call(prompt), backend.timeout_seconds)
+                except Exception as e:
+                    print(f"LLM backend {backend.name} failed: {type(e).__name__}: {e}")
+                    LLM_BACKEND_FAILURES.labels(backend.name, type(e).__name__).inc()
+                    breaker.record_failure()
+                    raise
+                latency = time.perf_counter() - started
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+
+        breaker.record_success()
+        self._latencies[backend.name].append(latency)
+        return result
+
+    def as_dict(self) -> Dict:
+        return {
+            backend.name: {
+                "circuit": self.breakers[backend.name].state,
+                "failures": self.breakers[backend.name].failures,
+                "hedge_delay_seconds": self.hedge_delay(backend),
+            }
+            for backend in self.backends
+        }
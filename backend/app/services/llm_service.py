@@ -1,26 +1,38 @@
+import asyncio
 import re
-from openai import OpenAI
-import os
-import ollama
 import json
-from typing import Dict, List
+import sqlite3
+from collections import defaultdict
+from functools import partial
+from typing import AsyncIterator, Dict, List, Tuple
 from app.config import get_settings
-from dotenv import load_dotenv
+from app.services.llm_cache import llm_cache
+from app.services.llm_clients import llm_clients
+from app.services.llm_router import Backend, LLMRouter
+from app.services.metrics import llm_span, record_tokens, span
 
 settings = get_settings()
-load_dotenv()
+
+# Shared by every LLMService instance so the limit applies to each model
+# server as a whole rather than per request; a hedge to the other backend
+# doesn't queue behind the slow one
+_generation_semaphores: Dict[str, asyncio.Semaphore] = defaultdict(
+    lambda: asyncio.Semaphore(settings.llm_max_concurrency))
 
 
 class LLMService:
     def __init__(self):
-        self.ollama_client = ollama.Client(host=settings['ollama_host'])
-        self.openai_client = OpenAI(
-            api_key=os.getenv('NVIDIA_API_KEY'),
-            base_url=settings['openai_base_url']
-        )
-        self.model = settings['ollama_model']
-        self.use_ollama = settings['use_ollama']
-        self.nvidia_nim_model = settings['nvidia_nim_model']
+        self.nvidia_nim_model = settings.nvidia_nim_model
+
+    # Clients are shared across services so connections are reused, and are
+    # only looked up on use so the unused backend's SDK is never imported
+    @property
+    def ollama_client(self):
+        return llm_clients.ollama
+
+    @property
+    def openai_client(self):
+        return llm_clients.openai
 
     async def generate_meal(
         self,
@@ -29,48 +41,206 @@ class LLMService:
         fiber_target: int,
         previous_meals: List[str],
         available_ingredients: List[str],
-        meal_type: str = "dinner"
+        meal_type: str = "dinner",
+        use_cache: bool = True,
+        fallback: bool = True
     ) -> Dict:
         """
         Generate a meal suggestion using Ollama LLM
-        Returns a dictionary with meal details
+        Returns a dictionary with meal details, or a fixed fallback meal when
+        the model fails unless fallback=False, which raises instead
         """
 
-        prompt = self._build_meal_prompt(
-            is_vegetarian,
-            protein_target,
-            fiber_target,
-            previous_meals,
-            available_ingredients,
-            meal_type
-        )
+        # Sorted, de-duplicated lists keep the prompt (and its cache key)
+        # stable regardless of the order rows came back from the database
+        with span("prompt_build"):
+            prompt = self._build_meal_prompt(
+                is_vegetarian,
+                protein_target,
+                fiber_target,
+                sorted(set(previous_meals)),
+                sorted(set(available_ingredients)),
+                meal_type
+            )
+
+        # Bypassing skips the lookup but still stores the fresh response
+        if use_cache and settings.llm_cache_enabled:
+            cached = await self._cached_meal(prompt)
+            if cached is not None:
+                print("LLM cache hit for meal type:", meal_type)
+                return cached
 
         try:
             print("Generating meal for meal type:", meal_type)
-            if self.use_ollama:
-                response = self.ollama_client.generate(
-                    model=self.model,
-                    prompt=prompt,
-                    format="json"
-                )
-                meal_data = json.loads(response)
-            else:
-                response = self.openai_client.chat.completions.create(
-                    model=self.nvidia_nim_model,
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0.7,
-                    max_tokens=1000,
-                    stream=False
-                )
-
-                json_content = re.search(r'```json(.*?)```', response.choices[0].message.content, re.DOTALL)
-                meal_data = json.loads(json_content.group(1))
-            return meal_data
-
+            # Hedged across backends, and bounded by their timeouts
+            backend, meal_data = await llm_router.complete(prompt)
         except Exception as e:
             print(f"Error generating meal: {e}.\nWas building the meal plan for {meal_type}.")
+            if not fallback:
+                raise
             return self._get_fallback_meal(is_vegetarian, meal_type)
 
+        await self._cache_meal(prompt, backend, meal_data)
+        return meal_data
+
+    async def stream_meal(
+        self,
+        is_vegetarian: bool,
+        protein_target: int,
+        fiber_target: int,
+        previous_meals: List[str],
+        available_ingredients: List[str],
+        meal_type: str = "dinner",
+        use_cache: bool = True
+    ) -> AsyncIterator[Tuple[str, object]]:
+        """
+        Streaming variant of generate_meal.
+        Yields ("token", text) while the model writes and a final ("meal", dict).
+        """
+        with span("prompt_build"):
+            prompt = self._build_meal_prompt(
+                is_vegetarian,
+                protein_target,
+                fiber_target,
+                sorted(set(previous_meals)),
+                sorted(set(available_ingredients)),
+                meal_type
+            )
+
+        if use_cache and settings.llm_cache_enabled:
+            cached = await self._cached_meal(prompt)
+            if cached is not None:
+                print("LLM cache hit for meal type:", meal_type)
+                yield "meal", cached
+                return
+
+        try:
+            print("Streaming meal for meal type:", meal_type)
+            # Token streams can't be raced, so streaming only skips backends
+            # whose circuit is open
+            backend = llm_router.first_available()
+            breaker = llm_router.breakers[backend.name]
+            chunks = []
+            try:
+                async with _generation_semaphores[backend.name]:
+                    with llm_span(backend.name):
+                        if backend.name == "nim":
+                            stream = await self.openai_client.chat.completions.create(
+                                model=self.nvidia_nim_model,
+                                messages=[{"role": "user", "content": prompt}],
+                                temperature=0.7,
+                                max_tokens=1000,
+                                stream=True,
+                                stream_options={"include_usage": True}
+                            )
+                            async for chunk in stream:
+                                if chunk.usage:
+                                    record_tokens(backend.name, chunk.usage.prompt_tokens,
+                                                  chunk.usage.completion_tokens)
+                                if not chunk.choices:
+                                    continue
+                                text = chunk.choices[0].delta.content or ""
+                                chunks.append(text)
+                                yield "token", text
+                        else:
+                            stream = await self.ollama_client.generate(
+                                model=self._ollama_model(backend.name),
+                                prompt=prompt,
+                                format="json",
+                                stream=True
+                            )
+                            async for part in stream:
+                                # Counts arrive on the final part only
+                                record_tokens(backend.name, part.get('prompt_eval_count'),
+                                              part.get('eval_count'))
+                                chunks.append(part['response'])
+                                yield "token", part['response']
+
+                meal_data = self._parse_meal_response("".join(chunks), backend.name)
+            except (asyncio.CancelledError, GeneratorExit):
+                breaker.release()
+                raise
+            except Exception:
+                breaker.record_failure()
+                raise
+            breaker.record_success()
+
+        except Exception as e:
+            print(f"Error streaming meal: {e}.\nWas building the meal plan for {meal_type}.")
+            yield "meal", self._get_fallback_meal(is_vegetarian, meal_type)
+            return
+
+        await self._cache_meal(prompt, backend.name, meal_data)
+        yield "meal", meal_data
+
+    def _cache_key(self, prompt: str, backend: str) -> str:
+        """Responses are cached under the model of the backend that produced them"""
+        model = self.nvidia_nim_model if backend == "nim" else self._ollama_model(backend)
+        return llm_cache.make_key(prompt, model)
+
+    # The cache is SQLite, so its calls run in a thread to keep the event
+    # loop free, and its errors never cost the caller a real reply
+    async def _cached_meal(self, prompt: str):
+        """A cached response from any backend, preferring them in routing order"""
+        keys = [self._cache_key(prompt, backend.name) for backend in llm_router.backends]
+        try:
+            return await asyncio.to_thread(llm_cache.get_many, keys)
+        except sqlite3.Error as e:
+            print(f"Error reading LLM cache: {e}")
+            return None
+
+    async def _cache_meal(self, prompt: str, backend: str, meal_data: Dict):
+        if not settings.llm_cache_enabled:
+            return
+        try:
+            await asyncio.to_thread(llm_cache.set, self._cache_key(prompt, backend), meal_data)
+        except sqlite3.Error as e:
+            print(f"Error writing LLM cache: {e}")
+
+    async def _request_meal(self, backend: str, prompt: str) -> Dict:
+        """
+        One non-streaming call to a backend, returning the parsed meal.
+        The router holds the backend's generation semaphore around it.
+        """
+        if backend == "nim":
+            response = await self.openai_client.chat.completions.create(
+                model=self.nvidia_nim_model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.7,
+                max_tokens=1000,
+                stream=False
+            )
+        else:
+            response = await self.ollama_client.generate(
+                model=self._ollama_model(backend),
+                prompt=prompt,
+                format="json"
+            )
+
+        if backend == "nim":
+            if response.usage:
+                record_tokens(backend, response.usage.prompt_tokens,
+                              response.usage.completion_tokens)
+            content = response.choices[0].message.content
+        else:
+            record_tokens(backend, response.get('prompt_eval_count'),
+                          response.get('eval_count'))
+            content = response['response']
+        # Parsed here so a malformed reply counts against the backend
+        return self._parse_meal_response(content, backend)
+
+    def _ollama_model(self, backend: str) -> str:
+        return "fake" if backend == "fake" else settings.ollama_model
+
+    def _parse_meal_response(self, content: str, backend: str) -> Dict:
+        """Extract the meal JSON from a raw model response"""
+        with span("json_extraction"):
+            if backend != "nim":
+                return json.loads(content)
+
+            json_content = re.search(r'```json(.*?)```', content, re.DOTALL)
+            return json.loads(json_content.group(1))
+
     def _build_meal_prompt(
         self,
         is_vegetarian: bool,
@@ -163,3 +333,35 @@ Make it nutritious, varied, and delicious. Ensure protein and fiber targets are
                 "instructions": "Grill chicken, steam vegetables, serve together",
                 "prep_time_minutes": 30
             }
+
+
+def _router_backends() -> List[Backend]:
+    """The configured backend first, then the other one when hedging is enabled"""
+    if settings.fake_llm_enabled:
+        names = ["fake"]
+    else:
+        names = ["ollama", "nim"] if settings.use_ollama else ["nim", "ollama"]
+        if not settings.llm_hedge_enabled:
+            names = names[:1]
+
+    timeouts = {
+        "fake": settings.ollama_timeout_seconds,
+        "ollama": settings.ollama_timeout_seconds,
+        "nim": settings.nim_timeout_seconds,
+    }
+    service = LLMService()
+    return [
+        Backend(name, partial(service._request_meal, name), timeouts[name],
+                _generation_semaphores[name])
+        for name in names
+    ]
+
+
+llm_router = LLMRouter(
+    backends=_router_backends(),
+    hedge_percentile=settings.llm_hedge_percentile,
+    hedge_min_delay_seconds=settings.llm_hedge_min_delay_seconds,
+    latency_window=settings.llm_hedge_latency_window,
+    failure_threshold=settings.llm_breaker_failure_threshold,
+    cooldown_seconds=settings.llm_breaker_cooldown_seconds
+)
@@ -1,94 +1,607 @@
+import asyncio
+from collections import defaultdict
 from datetime import date, timedelta
-from typing import List
-from sqlalchemy.orm import Session
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union
+from sqlalchemy import func, literal, select, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+from app.config import get_settings
 from app.models.meal import Meal
 from app.models.meal_plan import MealPlan
 from app.models.user import User
 from app.models.inventory import InventoryItem
+from app.services.ingredients import build_meal_ingredients, canonical_name
 from app.services.llm_service import LLMService
+from app.services.metrics import span
+from app.services.meal_history import meal_history_cache
+from app.services.meal_pool import meal_pool
+from app.services.meal_retriever import MealRetriever
 from app.schemas.meal import MealCreate
 
+settings = get_settings()
+
+MEAL_TYPES = ["breakfast", "lunch", "dinner"]
+# Every generated row carries all columns so they fit one multi-row INSERT
+MEAL_COLUMNS = [
+    column.key for column in Meal.__table__.columns
+    if column.key not in ("id", "normalized_name", "updated_at")
+]
+HISTORY_PADDING = timedelta(days=14)
+
 
 class MealGeneratorService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.llm_service = LLMService()
+        self.retriever = MealRetriever(db)
 
-    async def generate_daily_meals(self, user_id: int, target_date: date):
-        """Generate breakfast, lunch, and dinner for a user on a specific date"""
-        user = self.db.query(User).filter(User.id == user_id).first()
+    async def generate_daily_meals(
+        self,
+        user_id: int,
+        target_date: date,
+        use_cache: bool = True,
+        skip_filled: bool = False
+    ) -> List[MealPlan]:
+        """
+        Generate breakfast, lunch, and dinner for a user on a specific date.
+        use_cache=False skips both the meal library and the LLM cache.
+        Existing slots are replaced, or left alone with skip_filled=True.
+        """
+        with span("user_lookup"):
+            user = await self.db.get(User, user_id)
         if not user:
             raise ValueError(f"User {user_id} not found")
 
+        meal_types = await self._open_meal_types(user_id, target_date, skip_filled)
+        if not meal_types:
+            return []
+
         # Get previous 7 days of meals to avoid repetition
-        previous_meals = self._get_recent_meals(user_id, days=7)
+        previous_meals = await self._get_recent_meals(user_id, target_date, days=7)
 
         # Get available ingredients
-        available_ingredients = self._get_inventory_items()
+        available_ingredients = await self._get_inventory_items()
+
+        # Serve what the meal library and then the warm pool can, and ask
+        # the LLM for the rest
+        ready = await self._ready_meals(
+            user, meal_types, previous_meals, available_ingredients, use_cache)
+        missing = [meal_type for meal_type in meal_types if meal_type not in ready]
+        previous_meals = previous_meals + [
+            meal.name if isinstance(meal, Meal) else meal["name"] for meal in ready.values()]
+        await self._end_reads()
 
-        meal_plans = []
-        for meal_type in ["breakfast", "lunch", "dinner"]:
-            meal_data = await self.llm_service.generate_meal(
+        # The LLM calls are independent, so run them together; the service
+        # caps how many are in flight at once
+        generated = await asyncio.gather(*(
+            self.llm_service.generate_meal(
                 is_vegetarian=user.is_vegetarian,
                 protein_target=user.protein_target,
                 fiber_target=user.fiber_target,
                 previous_meals=previous_meals,
                 available_ingredients=available_ingredients,
-                meal_type=meal_type
+                meal_type=meal_type,
+                use_cache=use_cache
             )
+            for meal_type in missing
+        ))
+        meals = {**ready, **dict(zip(missing, generated))}
 
-            # Create or get existing meal
-            meal = self._create_or_get_meal(meal_data)
+        resolved = await self._resolve_meals([meals[meal_type] for meal_type in meal_types])
+        meal_plans = await self._upsert_slots(user_id, [
+            (target_date, meal_type, meal) for meal_type, meal in zip(meal_types, resolved)
+        ])
 
-            # Create meal plan entry
-            meal_plan = MealPlan(
-                user_id=user_id,
-                date=target_date,
-                meal_type=meal_type,
-                meal_id=meal.id,
-                eaten_outside=False
-            )
-            self.db.add(meal_plan)
-            meal_plans.append(meal_plan)
+        await self._commit_slots(user_id, meal_plans)
+        return meal_plans
+
+    async def stream_daily_meals(
+        self,
+        user_id: int,
+        target_date: date,
+        use_cache: bool = True,
+        skip_filled: bool = False
+    ) -> AsyncIterator[Tuple[str, str, object]]:
+        """
+        Streaming variant of generate_daily_meals.
+        Yields ("token", meal_type, text) while meals are being written and
+        ("meal", meal_type, MealPlan) as soon as each one is committed.
+        """
+        with span("user_lookup"):
+            user = await self.db.get(User, user_id)
+        if not user:
+            raise ValueError(f"User {user_id} not found")
+
+        meal_types = await self._open_meal_types(user_id, target_date, skip_filled)
+        previous_meals = await self._get_recent_meals(user_id, target_date, days=7)
+        available_ingredients = await self._get_inventory_items()
+
+        ready = await self._ready_meals(
+            user, meal_types, previous_meals, available_ingredients, use_cache)
+        previous_meals = previous_meals + [
+            meal.name if isinstance(meal, Meal) else meal["name"] for meal in ready.values()]
+
+        # Library and pool hits need no LLM call, so they go out first
+        if ready:
+            resolved = await self._resolve_meals(list(ready.values()))
+            meal_plans = await self._upsert_slots(user_id, [
+                (target_date, meal_type, meal) for meal_type, meal in zip(ready, resolved)
+            ])
+            await self._commit_slots(user_id, meal_plans)
+            for meal_plan in meal_plans:
+                yield "meal", meal_plan.meal_type, meal_plan
+
+        await self._end_reads()
+        events: asyncio.Queue = asyncio.Queue()
+
+        async def produce(meal_type: str):
+            try:
+                async for kind, payload in self.llm_service.stream_meal(
+                    is_vegetarian=user.is_vegetarian,
+                    protein_target=user.protein_target,
+                    fiber_target=user.fiber_target,
+                    previous_meals=previous_meals,
+                    available_ingredients=available_ingredients,
+                    meal_type=meal_type,
+                    use_cache=use_cache
+                ):
+                    await events.put((kind, meal_type, payload))
+            finally:
+                await events.put(("end", meal_type, None))
 
-        self.db.commit()
+        tasks = [
+            asyncio.create_task(produce(meal_type))
+            for meal_type in meal_types if meal_type not in ready
+        ]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                kind, meal_type, payload = await events.get()
+                if kind == "end":
+                    remaining -= 1
+                elif kind == "meal":
+                    meal, = await self._upsert_meals([payload])
+                    meal_plan, = await self._upsert_slots(
+                        user_id, [(target_date, meal_type, meal)])
+                    await self._commit_slots(user_id, [meal_plan])
+                    yield kind, meal_type, meal_plan
+                else:
+                    yield kind, meal_type, payload
+        finally:
+            # The client may disconnect mid-stream; stop the remaining LLM calls
+            for task in tasks:
+                task.cancel()
+
+    async def generate_meal_plans(
+        self,
+        user_id: int,
+        start_date: date,
+        end_date: date,
+        meal_types: Optional[List[str]] = None,
+        use_cache: bool = True,
+        days: int = 7,
+        on_progress: Optional[Callable[[date, str, str], Awaitable[None]]] = None,
+        skip_filled: bool = False,
+        fallback: bool = True
+    ) -> List[MealPlan]:
+        """
+        Generate meals for every day in a date range and commit them together.
+        on_progress is called with (date, meal_type, status) as slots start and
+        finish, or are skipped because skip_filled found them already planned.
+        With fallback=False a slot the LLM fails on is left empty and reported
+        as "failed" instead of getting the fixed fallback meal.
+        """
+        with span("user_lookup"):
+            user = await self.db.get(User, user_id)
+        if not user:
+            raise ValueError(f"User {user_id} not found")
+
+        meal_types = list(dict.fromkeys(meal_types or MEAL_TYPES))
+        target_dates = [
+            start_date + timedelta(days=offset)
+            for offset in range((end_date - start_date).days + 1)
+        ]
+
+        # Stored history around the range, plus the meals picked so far in
+        # this batch. Both feed the repetition window of every slot.
+        stored = await self._get_meals_by_date(
+            user_id, start_date - timedelta(days=days), end_date + timedelta(days=days))
+        picked: Dict[date, List[str]] = defaultdict(list)
+
+        available_ingredients = await self._get_inventory_items()
+
+        # The workers share this session, so the library is read up front
+        if use_cache and settings.meal_retrieval_enabled:
+            await self.retriever.load(user, meal_types)
+
+        filled = await self._filled_slots(user_id, start_date, end_date) if skip_filled else set()
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for target_date in target_dates:
+            for meal_type in meal_types:
+                if (target_date, meal_type) in filled:
+                    if on_progress:
+                        await on_progress(target_date, meal_type, "skipped")
+                    continue
+                queue.put_nowait((target_date, meal_type))
+        await self._end_reads()
+
+        results = []
+
+        async def worker():
+            while not queue.empty():
+                target_date, meal_type = queue.get_nowait()
+                if on_progress:
+                    await on_progress(target_date, meal_type, "running")
+                # The window is read when the slot is picked up, so it
+                # includes whatever earlier slots have produced by then
+                previous_meals = [
+                    name
+                    for by_date in (stored, picked)
+                    for day, names in by_date.items()
+                    if abs((day - target_date).days) <= days
+                    for name in names
+                ]
+                meal = (await self._retrieve_meals(
+                    user, [meal_type], previous_meals, available_ingredients, use_cache
+                )).get(meal_type)
+                if meal is None:
+                    try:
+                        meal = await self.llm_service.generate_meal(
+                            is_vegetarian=user.is_vegetarian,
+                            protein_target=user.protein_target,
+                            fiber_target=user.fiber_target,
+                            previous_meals=previous_meals,
+                            available_ingredients=available_ingredients,
+                            meal_type=meal_type,
+                            use_cache=use_cache,
+                            fallback=fallback
+                        )
+                    except Exception as e:
+                        if fallback:
+                            raise
+                        print(f"Could not generate {meal_type} for {target_date}: {e}")
+                        if on_progress:
+                            await on_progress(target_date, meal_type, "failed")
+                        continue
+                picked[target_date].append(
+                    meal.name if isinstance(meal, Meal) else meal["name"])
+                results.append((target_date, meal_type, meal))
+                if on_progress:
+                    await on_progress(target_date, meal_type, "done")
+
+        await asyncio.gather(*(
+            worker() for _ in range(settings.range_generation_workers)
+        ))
+
+        results.sort(key=lambda r: (r[0], meal_types.index(r[1])))
+        resolved = await self._resolve_meals([meal for _, _, meal in results])
+        meal_plans = await self._upsert_slots(user_id, [
+            (target_date, meal_type, meal)
+            for (target_date, meal_type, _), meal in zip(results, resolved)
+        ])
+
+        await self._commit_slots(user_id, meal_plans)
         return meal_plans
 
-    def _get_recent_meals(self, user_id: int, days: int = 7) -> List[str]:
-        """Get list of recent meal names to avoid repetition"""
-        start_date = date.today() - timedelta(days=days)
+    async def plan_from_library(
+        self,
+        user_id: int,
+        start_date: date,
+        end_date: date,
+        meal_types: Optional[List[str]] = None,
+        days: int = 7,
+        llm_fallback: bool = True
+    ) -> Tuple[List[MealPlan], List[Tuple[date, str]]]:
+        """
+        Plan a date range from stored meals. Slots no stored meal can fill are
+        generated by the LLM unless llm_fallback=False. Returns the committed
+        plans and the (date, meal_type) slots that are still unfilled.
+        """
+        with span("user_lookup"):
+            user = await self.db.get(User, user_id)
+        if not user:
+            raise ValueError(f"User {user_id} not found")
+
+        meal_types = list(dict.fromkeys(meal_types or MEAL_TYPES))
+        target_dates = [
+            start_date + timedelta(days=offset)
+            for offset in range((end_date - start_date).days + 1)
+        ]
+        history = await self._get_meals_by_date(
+            user_id, start_date - timedelta(days=days), end_date + timedelta(days=days))
+
+        # NumPy is only needed here, so it stays out of app startup
+        from app.services.meal_optimizer import MealOptimizer
+
+        plan = await MealOptimizer(self.db).plan_days(
+            user, target_dates, meal_types, history, days=days)
+
+        if llm_fallback and any(
+                meal is None for by_type in plan.values() for meal in by_type.values()):
+            await self._generate_unfilled(user, plan, history, days)
+
+        slots = []
+        unfilled = []
+        for target_date in target_dates:
+            for meal_type in meal_types:
+                meal = plan[target_date][meal_type]
+                if meal is None:
+                    unfilled.append((target_date, meal_type))
+                else:
+                    slots.append((target_date, meal_type, meal))
+        resolved = await self._resolve_meals([meal for _, _, meal in slots])
+        meal_plans = await self._upsert_slots(user_id, [
+            (target_date, meal_type, meal)
+            for (target_date, meal_type, _), meal in zip(slots, resolved)
+        ])
+
+        await self._commit_slots(user_id, meal_plans)
+        return meal_plans, unfilled
+
+    async def _generate_unfilled(
+        self,
+        user: User,
+        plan: Dict[date, Dict[str, Union[Meal, dict, None]]],
+        history: Dict[date, List[str]],
+        days: int
+    ):
+        """Fill the optimizer's empty slots from the LLM in place, in date order"""
+        available_ingredients = await self._get_inventory_items()
+        await self._end_reads()
+        for target_date in sorted(plan):
+            for meal_type, meal in plan[target_date].items():
+                if meal is not None:
+                    continue
 
-        recent_plans = (
-            self.db.query(MealPlan)
-            .filter(MealPlan.user_id == user_id)
-            .filter(MealPlan.date >= start_date)
-            .filter(MealPlan.meal_id.isnot(None))
-            .all()
+                previous_meals = [
+                    name for day, names in history.items()
+                    if abs((day - target_date).days) <= days
+                    for name in names
+                ] + [
+                    picked.name if isinstance(picked, Meal) else picked["name"]
+                    for day, by_type in plan.items()
+                    if abs((day - target_date).days) <= days
+                    for picked in by_type.values() if picked is not None
+                ]
+                try:
+                    plan[target_date][meal_type] = await self.llm_service.generate_meal(
+                        is_vegetarian=user.is_vegetarian,
+                        protein_target=user.protein_target,
+                        fiber_target=user.fiber_target,
+                        previous_meals=previous_meals,
+                        available_ingredients=available_ingredients,
+                        meal_type=meal_type,
+                        # A hardcoded meal is worse than reporting the slot unfilled
+                        fallback=False
+                    )
+                except Exception as e:
+                    print(f"Could not generate {meal_type} for {target_date}: {e}")
+
+    async def _upsert_slots(self, user_id: int, slots: List[Tuple[date, str, Meal]]) -> List[MealPlan]:
+        """
+        Write each (date, meal_type, meal) slot in one statement. A slot that
+        is already planned gets the new meal and loses its eaten-outside mark.
+        """
+        if not slots:
+            return []
+
+        with span("slot_upsert"):
+            statement = pg_insert(MealPlan).values([
+                {
+                    "user_id": user_id,
+                    "date": target_date,
+                    "meal_type": meal_type,
+                    "meal_id": meal.id,
+                    "eaten_outside": False,
+                }
+                for target_date, meal_type, meal in slots
+            ])
+            statement = statement.on_conflict_do_update(
+                constraint="uq_meal_plans_slot",
+                set_={
+                    "meal_id": statement.excluded.meal_id,
+                    "eaten_outside": False,
+                    "updated_at": func.now(),
+                }
+            ).returning(MealPlan)
+            meal_plans = (await self.db.scalars(
+                statement, execution_options={"populate_existing": True}
+            )).all()
+
+        # Attach the meals without a lazy load and keep the order of the slots
+        by_slot = {(meal_plan.date, meal_plan.meal_type): meal_plan for meal_plan in meal_plans}
+        ordered = []
+        for target_date, meal_type, meal in slots:
+            meal_plan = by_slot[(target_date, meal_type)]
+            set_committed_value(meal_plan, "meal", meal)
+            ordered.append(meal_plan)
+        return ordered
+
+    async def _commit_slots(self, user_id: int, meal_plans: List[MealPlan]):
+        """Commit written slots and record them in the user's cached history"""
+        with span("commit"):
+            await self.db.commit()
+        for meal_plan in meal_plans:
+            meal_history_cache.record(
+                user_id, meal_plan.date, meal_plan.meal_type, meal_plan.meal.name)
+
+    async def _end_reads(self):
+        """
+        Commit the read-only transaction before awaiting the LLM, so its
+        pooled connection isn't held idle for the length of the calls
+        """
+        await self.db.commit()
+
+    async def _filled_slots(self, user_id: int, start_date: date, end_date: date) -> Set[Tuple[date, str]]:
+        rows = await self.db.execute(
+            select(MealPlan.date, MealPlan.meal_type)
+            .where(MealPlan.user_id == user_id)
+            .where(MealPlan.date >= start_date)
+            .where(MealPlan.date <= end_date)
         )
+        return {(plan_date, meal_type) for plan_date, meal_type in rows}
+
+    async def _open_meal_types(self, user_id: int, target_date: date, skip_filled: bool) -> List[str]:
+        """Meal types to generate for a day, leaving out planned ones when skip_filled is set"""
+        if not skip_filled:
+            return list(MEAL_TYPES)
+        filled = await self._filled_slots(user_id, target_date, target_date)
+        return [meal_type for meal_type in MEAL_TYPES if (target_date, meal_type) not in filled]
 
-        meal_ids = [plan.meal_id for plan in recent_plans]
-        meals: List[Meal] = self.db.query(
-            Meal).filter(Meal.id.in_(meal_ids)).all()
+    async def _get_meals_by_date(self, user_id: int, start_date: date, end_date: date) -> Dict[date, List[str]]:
+        """Get planned meal names per date within a date range"""
+        cached = meal_history_cache.get(user_id, start_date, end_date)
+        if cached is not None:
+            return cached
 
-        return [meal.name for meal in meals]
+        with span("meal_history"):
+            # Load a wider window so generation for neighbouring days is served from the cache
+            load_start = start_date - HISTORY_PADDING
+            load_end = end_date + HISTORY_PADDING
+            version = meal_history_cache.version()
+            rows = await self.db.execute(
+                select(MealPlan.date, MealPlan.meal_type, Meal.name)
+                .join(Meal, MealPlan.meal_id == Meal.id)
+                .where(MealPlan.user_id == user_id)
+                .where(MealPlan.date >= load_start)
+                .where(MealPlan.date <= load_end)
+            )
+
+            slots: Dict[date, Dict[str, str]] = defaultdict(dict)
+            for plan_date, meal_type, name in rows:
+                slots[plan_date][meal_type] = name
+            meal_history_cache.put(user_id, load_start, load_end, slots, version)
+            return {
+                plan_date: list(by_type.values())
+                for plan_date, by_type in slots.items()
+                if start_date <= plan_date <= end_date
+            }
 
-    def _get_inventory_items(self) -> List[str]:
+    async def _get_recent_meals(self, user_id: int, target_date: date, days: int = 7) -> List[str]:
+        """Get meal names planned within `days` of the target date to avoid repetition"""
+        with span("recent_meals"):
+            meals_by_date = await self._get_meals_by_date(
+                user_id, target_date - timedelta(days=days), target_date + timedelta(days=days))
+            return [name for names in meals_by_date.values() for name in names]
+
+    async def _get_inventory_items(self) -> List[str]:
         """Get list of available ingredients from inventory"""
-        items = self.db.query(InventoryItem).all()
-        return [item.item_name for item in items]
-
-    def _create_or_get_meal(self, meal_data: dict) -> Meal:
-        """Create a new meal or return existing one with same name"""
-        existing = (
-            self.db.query(Meal)
-            .filter(Meal.name == meal_data["name"])
-            .first()
-        )
+        with span("inventory_items"):
+            items = (await self.db.execute(select(InventoryItem))).scalars().all()
+            return [item.item_name for item in items]
+
+    async def _retrieve_meals(
+        self,
+        user: User,
+        meal_types: List[str],
+        previous_meals: List[str],
+        available_ingredients: List[str],
+        use_library: bool = True
+    ) -> Dict[str, Meal]:
+        """Pick stored meals for as many meal types as the library can serve"""
+        with span("library_retrieval"):
+            if not (use_library and settings.meal_retrieval_enabled):
+                return {}
+
+            await self.retriever.load(user, meal_types)
+            retrieved = {}
+            excluded = list(previous_meals)
+            for meal_type in meal_types:
+                meal = await self.retriever.find_meal(
+                    user, meal_type, excluded, available_ingredients)
+                if meal:
+                    retrieved[meal_type] = meal
+                    excluded.append(meal.name)
+            return retrieved
+
+    async def _ready_meals(
+        self,
+        user: User,
+        meal_types: List[str],
+        previous_meals: List[str],
+        available_ingredients: List[str],
+        use_cache: bool = True
+    ) -> Dict[str, Union[Meal, dict]]:
+        """
+        Meals that need no LLM call: stored meals from the library, then
+        pre-generated meal data from the warm pool for the remaining types
+        """
+        ready: Dict[str, Union[Meal, dict]] = await self._retrieve_meals(
+            user, meal_types, previous_meals, available_ingredients, use_cache)
+        if not use_cache:
+            return ready
+
+        with span("meal_pool"):
+            excluded = previous_meals + [meal.name for meal in ready.values()]
+            for meal_type in meal_types:
+                if meal_type in ready:
+                    continue
+                meal = meal_pool.take(
+                    user.is_vegetarian, meal_type, user.protein_target, user.fiber_target, excluded)
+                if meal:
+                    ready[meal_type] = meal
+                    excluded.append(meal["name"])
+        return ready
+
+    async def _resolve_meals(self, meals: List[Union[Meal, dict]]) -> List[Meal]:
+        """Return retrieved meals as they are and persist generated meal data, in order"""
+        generated = [meal for meal in meals if not isinstance(meal, Meal)]
+        stored = iter(await self._upsert_meals(generated)) if generated else iter(())
+        return [meal if isinstance(meal, Meal) else next(stored) for meal in meals]
+
+    async def _upsert_meals(self, meals_data: List[dict]) -> List[Meal]:
+        """
+        Insert new meals and fetch existing ones with the same normalized
+        name in a single statement, returning one meal per input in order.
+        The unique index makes this safe under concurrent generation.
+        """
+        with span("meal_upsert"):
+            rows = {}
+            for meal_data in meals_data:
+                row = {column: meal_data.get(column) for column in MEAL_COLUMNS}
+                row["normalized_name"] = canonical_name(meal_data["name"])
+                rows.setdefault(row["normalized_name"], row)
+            names = list(rows)
+
+            inserted = (
+                pg_insert(Meal)
+                .values(list(rows.values()))
+                .on_conflict_do_nothing(index_elements=[Meal.normalized_name])
+                .returning(*Meal.__table__.c, literal(True).label("is_new"))
+                .cte("inserted")
+            )
+            # Both halves read the same snapshot, so a name is either
+            # inserted here or already stored, never both
+            existing = (
+                select(*Meal.__table__.c, literal(False).label("is_new"))
+                .where(Meal.normalized_name.in_(names))
+            )
+            result = await self.db.execute(
+                select(Meal, inserted.c.is_new)
+                .from_statement(union_all(select(inserted), existing))
+            )
+
+            by_name, new_meals = {}, []
+            for meal, is_new in result:
+                by_name[meal.normalized_name] = meal
+                if is_new:
+                    new_meals.append(meal)
 
-        if existing:
-            return existing
+            # A concurrent transaction committed a name after this
+            # statement's snapshot was taken
+            missing = [name for name in names if name not in by_name]
+            if missing:
+                for meal in (await self.db.execute(
+                    select(Meal).where(Meal.normalized_name.in_(missing))
+                )).scalars():
+                    by_name[meal.normalized_name] = meal
 
-        meal = Meal(**meal_data)
-        self.db.add(meal)
-        self.db.flush()
-        return meal
+            if new_meals:
+                self.db.add_all([
+                    ingredient
+                    for meal in new_meals
+                    for ingredient in build_meal_ingredients(meal.id, meal.ingredients)
+                ])
+            return [by_name[canonical_name(meal_data["name"])] for meal_data in meals_data]
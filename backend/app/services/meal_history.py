@@ -0,0 +1,120 @@
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, List, Optional
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class _History:
+    def __init__(self, start_date: date, end_date: date, slots: Dict[date, Dict[str, str]]):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.slots = slots
+        self.loaded_at = time.monotonic()
+
+
+class MealHistoryCache:
+    """
+    Per-user cache of planned meal names by date and meal type, so repeated
+    generation for the same user reads its history once. Generation writes
+    through to it; other plan changes invalidate the user. Entries also
+    expire after a TTL, since other worker processes cannot invalidate them.
+
+    Every write or invalidation advances a version. A read from the database
+    takes the version first and is only cached if the user has not changed
+    since, so a slow read cannot bring back history older than a write.
+    """
+
+    def __init__(self, max_users: int, ttl_seconds: int):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, _History]" = OrderedDict()
+        self._version = 0
+        # Version of each user's last change, for the most recently changed users
+        self._changed: "OrderedDict[int, int]" = OrderedDict()
+        # Newest version dropped from _changed; users not in it may have changed up to here
+        self._forgotten = 0
+
+    def get(self, user_id: int, start_date: date, end_date: date) -> Optional[Dict[date, List[str]]]:
+        """Meal names per date for the range, or None when it is not cached"""
+        entry = self._entries.get(user_id)
+        if entry and time.monotonic() - entry.loaded_at > self.ttl_seconds:
+            del self._entries[user_id]
+            entry = None
+        if not entry or start_date < entry.start_date or end_date > entry.end_date:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(user_id)
+        return {
+            day: list(by_type.values())
+            for day, by_type in entry.slots.items()
+            if start_date <= day <= end_date and by_type
+        }
+
+    def version(self) -> int:
+        """Take before reading history from the database, and pass to put()"""
+        return self._version
+
+    def put(
+        self,
+        user_id: int,
+        start_date: date,
+        end_date: date,
+        slots: Dict[date, Dict[str, str]],
+        version: int
+    ):
+        if self._changed.get(user_id, self._forgotten) > version:
+            # Plans changed while this history was read, so it may miss them
+            return
+
+        self._entries[user_id] = _History(start_date, end_date, slots)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+
+    def record(self, user_id: int, target_date: date, meal_type: str, meal_name: str):
+        """Write a committed slot through to the user's cached history"""
+        self._touch(user_id)
+        entry = self._entries.get(user_id)
+        if entry and entry.start_date <= target_date <= entry.end_date:
+            entry.slots.setdefault(target_date, {})[meal_type] = meal_name
+
+    def invalidate(self, user_id: int):
+        self._touch(user_id)
+        self._entries.pop(user_id, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._version += 1
+        self._changed.clear()
+        self._forgotten = self._version
+
+    def _touch(self, user_id: int):
+        self._version += 1
+        self._changed[user_id] = self._version
+        self._changed.move_to_end(user_id)
+        while len(self._changed) > self.max_users:
+            _, version = self._changed.popitem(last=False)
+            self._forgotten = max(self._forgotten, version)
+
+    def as_dict(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "users": len(self._entries),
+            "max_users": self.max_users,
+        }
+
+
+meal_history_cache = MealHistoryCache(
+    max_users=settings.meal_history_cache_max_users,
+    ttl_seconds=settings.meal_history_cache_ttl_seconds
+)
@@ -0,0 +1,193 @@
+from datetime import date
+from itertools import combinations
+from typing import Dict, List, Optional, Set
+import numpy as np
+from sqlalchemy import Float, case, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import get_settings
+from app.models.inventory import InventoryItem
+from app.models.meal import Meal
+from app.models.meal_ingredient import MealIngredient
+from app.models.meal_plan import MealPlan
+from app.models.user import User
+
+settings = get_settings()
+
+
+class MealOptimizer:
+    """
+    Deterministic planner that picks stored meals for each slot so a day's
+    protein and fiber land as close to the user's targets as possible.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def plan_days(
+        self,
+        user: User,
+        target_dates: List[date],
+        meal_types: List[str],
+        history: Dict[date, List[str]],
+        days: int = 7
+    ) -> Dict[date, Dict[str, Optional[Meal]]]:
+        """
+        Choose a meal per slot for each date, in date order.
+        Meals in the stored history or already chosen within `days` of a date
+        are not repeated. Slots without candidates are None, and the rest of
+        the day is fitted to their share of the targets.
+        """
+        meals = await self._load_candidates(user)
+        if not meals:
+            return {target_date: dict.fromkeys(meal_types) for target_date in target_dates}
+
+        names = np.array([(meal.name or "").lower() for meal in meals])
+        protein = np.array([meal.protein or 0.0 for meal in meals])
+        fiber = np.array([meal.fiber or 0.0 for meal in meals])
+
+        planned_types = await self._planned_meal_types()
+        type_masks = {}
+        for meal_type in meal_types:
+            # Meals never planned before can fill any slot
+            mask = np.array([
+                meal_type in planned_types.get(meal.id, {meal_type}) for meal in meals
+            ])
+            type_masks[meal_type] = mask if mask.any() else np.ones(len(meals), dtype=bool)
+
+        # Targets scale with how many of the day's three meals are planned
+        share = len(meal_types) / 3
+        protein_target = max(user.protein_target * share, 1)
+        fiber_target = max(user.fiber_target * share, 1)
+
+        chosen: Dict[date, List[str]] = {}
+        plan = {}
+        for target_date in sorted(target_dates):
+            recent = {
+                (name or "").lower()
+                for by_date in (history, chosen)
+                for day, day_names in by_date.items()
+                if abs((day - target_date).days) <= days
+                for name in day_names
+            }
+            available = ~np.isin(names, list(recent))
+
+            pools = [
+                self._top_candidates(
+                    np.flatnonzero(type_masks[meal_type] & available),
+                    protein, fiber,
+                    protein_target / len(meal_types), fiber_target / len(meal_types)
+                )
+                for meal_type in meal_types
+            ]
+            plan[target_date] = dict.fromkeys(meal_types)
+            fillable = [
+                (meal_type, pool) for meal_type, pool in zip(meal_types, pools) if len(pool)
+            ]
+            if not fillable:
+                continue
+
+            share = len(fillable) / len(meal_types)
+            picks = self._best_combination(
+                [pool for _, pool in fillable], protein, fiber,
+                protein_target * share, fiber_target * share)
+            if picks is None:
+                continue
+
+            for (meal_type, _), index in zip(fillable, picks):
+                plan[target_date][meal_type] = meals[index]
+            chosen[target_date] = [meals[index].name for index in picks]
+        return plan
+
+    def _best_combination(
+        self,
+        pools: List[np.ndarray],
+        protein: np.ndarray,
+        fiber: np.ndarray,
+        protein_target: float,
+        fiber_target: float
+    ) -> Optional[List[int]]:
+        """
+        Evaluate every combination of one meal per pool at once by
+        broadcasting each pool along its own axis, and return the combination
+        with the smallest squared relative deviation from both targets.
+        """
+        dims = len(pools)
+        total_protein = np.zeros((1,) * dims)
+        total_fiber = np.zeros((1,) * dims)
+        for axis, pool in enumerate(pools):
+            shape = [1] * dims
+            shape[axis] = len(pool)
+            total_protein = total_protein + protein[pool].reshape(shape)
+            total_fiber = total_fiber + fiber[pool].reshape(shape)
+
+        cost = (
+            ((total_protein - protein_target) / protein_target) ** 2
+            + ((total_fiber - fiber_target) / fiber_target) ** 2
+        )
+
+        # The same meal twice in one day is not allowed
+        for first, second in combinations(range(dims), 2):
+            shape = [1] * dims
+            shape[first] = len(pools[first])
+            same = pools[first].reshape(shape)
+            shape = [1] * dims
+            shape[second] = len(pools[second])
+            cost = np.where(same == pools[second].reshape(shape), np.inf, cost)
+
+        best = np.unravel_index(np.argmin(cost), cost.shape)
+        if not np.isfinite(cost[best]):
+            return None
+        return [int(pools[axis][position]) for axis, position in enumerate(best)]
+
+    def _top_candidates(
+        self,
+        indices: np.ndarray,
+        protein: np.ndarray,
+        fiber: np.ndarray,
+        protein_share: float,
+        fiber_share: float
+    ) -> np.ndarray:
+        """Keep the meals closest to a single slot's share so the search stays small"""
+        limit = settings.optimizer_candidates_per_slot
+        if len(indices) <= limit:
+            return indices
+
+        distance = (
+            ((protein[indices] - protein_share) / protein_share) ** 2
+            + ((fiber[indices] - fiber_share) / fiber_share) ** 2
+        )
+        return indices[np.argsort(distance, kind="stable")[:limit]]
+
+    async def _load_candidates(self, user: User) -> List[Meal]:
+        """Meals matching the diet whose ingredients are sufficiently in stock"""
+        query = select(Meal)
+        if user.is_vegetarian:
+            query = query.where(Meal.is_vegetarian.is_(True))
+
+        has_inventory = (await self.db.execute(
+            select(InventoryItem.id).limit(1))).first() is not None
+        if has_inventory:
+            in_stock = MealIngredient.name.in_(select(func.lower(InventoryItem.item_name)))
+            coverage = (
+                select(MealIngredient.meal_id)
+                .group_by(MealIngredient.meal_id)
+                .having(
+                    cast(func.sum(case((in_stock, 1), else_=0)), Float)
+                    / func.count(MealIngredient.id)
+                    >= settings.optimizer_min_inventory_coverage
+                )
+            )
+            query = query.where(Meal.id.in_(coverage))
+
+        return (await self.db.execute(query.order_by(Meal.id))).scalars().all()
+
+    async def _planned_meal_types(self) -> Dict[int, Set[str]]:
+        rows = await self.db.execute(
+            select(MealPlan.meal_id, MealPlan.meal_type)
+            .where(MealPlan.meal_id.isnot(None))
+            .distinct()
+        )
+        planned: Dict[int, Set[str]] = {}
+        for meal_id, meal_type in rows:
+            planned.setdefault(meal_id, set()).add(meal_type)
+        return planned
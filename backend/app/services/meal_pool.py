@@ -0,0 +1,200 @@
+import asyncio
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, Optional, Set, Tuple
+from sqlalchemy import func, select
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models.user import User
+from app.services.ingredients import canonical_name
+from app.services.llm_service import LLMService
+
+settings = get_settings()
+
+# (is_vegetarian, meal_type, protein bucket, fiber bucket)
+PoolKey = Tuple[bool, str, int, int]
+
+
+class MealPool:
+    """
+    Meals generated ahead of demand for each diet, meal type and band of
+    protein and fiber targets, so a request can take one instead of waiting
+    on the model. Taking a meal below the low-water mark starts a background
+    refill. The pools live in memory, so prewarm() can fill the ones existing
+    users need at startup; it's opt-in because every start of every worker
+    process pays for those meals again. Pooled meals are generated without the
+    inventory, so they trade ingredient fit for latency.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        size: int,
+        low_water: int,
+        protein_bucket_size: int,
+        fiber_bucket_size: int,
+        max_keys: int,
+        refill_concurrency: int,
+        prewarm: bool
+    ):
+        self.enabled = enabled
+        self.size = size
+        self.low_water = low_water
+        self.protein_bucket_size = protein_bucket_size
+        self.fiber_bucket_size = fiber_bucket_size
+        self.max_keys = max_keys
+        self.prewarm_enabled = prewarm
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0
+        self.refill_failures = 0
+        self._pools: "OrderedDict[PoolKey, list[Dict]]" = OrderedDict()
+        self._refills: Dict[PoolKey, asyncio.Task] = {}
+        # Refills share the model server with foreground requests, so only a
+        # few run at once
+        self._refill_semaphore = asyncio.Semaphore(refill_concurrency)
+
+    def key_for(self, is_vegetarian: bool, meal_type: str, protein_target: int, fiber_target: int) -> PoolKey:
+        return (
+            is_vegetarian,
+            meal_type,
+            protein_target // self.protein_bucket_size,
+            fiber_target // self.fiber_bucket_size,
+        )
+
+    async def prewarm(self, meal_types: Iterable[str]):
+        """
+        Start refilling the pools for the diets and targets of existing users,
+        most common first, up to max_keys of them
+        """
+        if not self.enabled or not self.prewarm_enabled:
+            return
+
+        async with SessionLocal() as db:
+            rows = await db.execute(
+                select(User.is_vegetarian, User.protein_target, User.fiber_target, func.count())
+                .where(User.protein_target.isnot(None))
+                .where(User.fiber_target.isnot(None))
+                .group_by(User.is_vegetarian, User.protein_target, User.fiber_target)
+            )
+            demand: Counter = Counter()
+            for is_vegetarian, protein_target, fiber_target, users in rows:
+                for meal_type in meal_types:
+                    demand[self.key_for(bool(is_vegetarian), meal_type, protein_target, fiber_target)] += users
+
+        keys = [key for key, _ in demand.most_common(self.max_keys)]
+        # Least common first, so eviction reaches the most common keys last
+        for key in reversed(keys):
+            self._pools.setdefault(key, [])
+            self._pools.move_to_end(key)
+        for key in keys:
+            self._schedule_refill(key)
+
+    def take(
+        self,
+        is_vegetarian: bool,
+        meal_type: str,
+        protein_target: int,
+        fiber_target: int,
+        excluded: Iterable[str]
+    ) -> Optional[Dict]:
+        """Remove and return a pooled meal whose name is not excluded, topping the pool up"""
+        if not self.enabled:
+            return None
+
+        key = self.key_for(is_vegetarian, meal_type, protein_target, fiber_target)
+        pool = self._pools.setdefault(key, [])
+        self._pools.move_to_end(key)
+        while len(self._pools) > self.max_keys:
+            evicted, _ = self._pools.popitem(last=False)
+            task = self._refills.pop(evicted, None)
+            if task:
+                task.cancel()
+
+        excluded_names: Set[str] = {canonical_name(name) for name in excluded}
+        meal = next(
+            (meal for meal in pool if canonical_name(meal["name"]) not in excluded_names), None)
+        if meal is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            pool.remove(meal)
+
+        if len(pool) < self.low_water:
+            self._schedule_refill(key)
+        return meal
+
+    def _schedule_refill(self, key: PoolKey):
+        if key in self._refills:
+            return
+        task = asyncio.create_task(self._refill(key))
+        self._refills[key] = task
+        task.add_done_callback(lambda done: self._refill_done(key, done))
+
+    def _refill_done(self, key: PoolKey, task: asyncio.Task):
+        # An evicted key's refill may finish after a new one was scheduled
+        if self._refills.get(key) is task:
+            del self._refills[key]
+
+    async def _refill(self, key: PoolKey):
+        is_vegetarian, meal_type, protein_bucket, fiber_bucket = key
+        # Generate for the middle of the band
+        protein_target = protein_bucket * self.protein_bucket_size + self.protein_bucket_size // 2
+        fiber_target = fiber_bucket * self.fiber_bucket_size + self.fiber_bucket_size // 2
+        llm_service = LLMService()
+
+        while key in self._pools and len(self._pools[key]) < self.size:
+            pool = self._pools[key]
+            try:
+                async with self._refill_semaphore:
+                    meal = await llm_service.generate_meal(
+                        is_vegetarian=is_vegetarian,
+                        protein_target=protein_target,
+                        fiber_target=fiber_target,
+                        previous_meals=[meal["name"] for meal in pool],
+                        available_ingredients=[],
+                        meal_type=meal_type,
+                        use_cache=False,
+                        fallback=False
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # The next take retries; don't keep calling a failing backend
+                self.refill_failures += 1
+                return
+
+            self.generated += 1
+            if all(canonical_name(meal["name"]) != canonical_name(pooled["name"]) for pooled in pool):
+                pool.append(meal)
+
+    async def stop(self):
+        tasks = list(self._refills.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def as_dict(self) -> Dict:
+        takes = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / takes if takes else 0.0,
+            "generated": self.generated,
+            "refill_failures": self.refill_failures,
+            "pools": len(self._pools),
+            "pooled_meals": sum(len(pool) for pool in self._pools.values()),
+            "refilling": len(self._refills),
+        }
+
+
+meal_pool = MealPool(
+    enabled=settings.meal_pool_enabled,
+    size=settings.meal_pool_size,
+    low_water=settings.meal_pool_low_water,
+    protein_bucket_size=settings.meal_pool_protein_bucket_size,
+    fiber_bucket_size=settings.meal_pool_fiber_bucket_size,
+    max_keys=settings.meal_pool_max_keys,
+    refill_concurrency=settings.meal_pool_refill_concurrency,
+    prewarm=settings.meal_pool_prewarm
+)
@@ -0,0 +1,165 @@
+import asyncio
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import Row, exists, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import get_settings
+from app.models.meal import Meal
+from app.models.meal_plan import MealPlan
+from app.models.user import User
+
+settings = get_settings()
+
+# Relative weight of each criterion in a meal's score; they sum to 1.
+# Candidates are already filtered by meal type, so it isn't scored.
+SCORE_WEIGHTS = {
+    "protein": 0.4,
+    "fiber": 0.3,
+    "inventory": 0.3,
+}
+
+
+class RetrievalStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def as_dict(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+retrieval_stats = RetrievalStats()
+
+
+class MealRetriever:
+    """
+    Finds a stored meal that fits a user's constraints well enough to
+    reuse, so the LLM is only called when the library has no good match.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        # Scoring columns of the candidate meals, per (is_vegetarian, meal_type)
+        self._libraries: Dict[Tuple[bool, str], List[Row]] = {}
+        self._meal_types: Dict[int, Set[str]] = {}
+        # Range workers look up winners concurrently on the shared session
+        self._fetch_lock = asyncio.Lock()
+
+    async def find_meal(
+        self,
+        user: User,
+        meal_type: str,
+        excluded_names: List[str],
+        available_ingredients: List[str]
+    ) -> Optional[Meal]:
+        """Return the best scoring meal above the threshold, or None; call load() first"""
+
+        excluded = {(name or "").lower() for name in excluded_names}
+        inventory = [item.lower() for item in available_ingredients]
+
+        best, best_score = None, 0.0
+        for meal in self._libraries[(bool(user.is_vegetarian), meal_type)]:
+            if (meal.name or "").lower() in excluded:
+                continue
+
+            score = self.score_meal(meal, user, inventory)
+            if score > best_score:
+                best, best_score = meal, score
+
+        hit = best is not None and best_score >= settings.meal_retrieval_threshold
+        retrieval_stats.record(hit)
+        if not hit:
+            return None
+
+        async with self._fetch_lock:
+            meal = await self.db.get(Meal, best.id)
+            # Range workers go on to await the LLM, so don't hold the
+            # connection in the meantime
+            await self.db.commit()
+            return meal
+
+    def score_meal(self, meal: Row, user: User, inventory: List[str]) -> float:
+        """Score a meal between 0 and 1 against a single meal's share of the user's targets"""
+        protein_share = user.protein_target / 3
+        fiber_share = user.fiber_target / 3
+
+        scores = {
+            "protein": _closeness(meal.protein, protein_share),
+            "fiber": _closeness(meal.fiber, fiber_share),
+            "inventory": _inventory_coverage(meal.ingredients, inventory),
+        }
+        return sum(SCORE_WEIGHTS[name] * value for name, value in scores.items())
+
+    async def load(self, user: User, meal_types: List[str]):
+        """
+        Load the candidates for the user's diet and the given meal types,
+        skipping those already loaded. A meal is a candidate for a meal type
+        if it was planned as that type before or has never been planned.
+        """
+        is_vegetarian = bool(user.is_vegetarian)
+        missing = [
+            meal_type for meal_type in meal_types
+            if (is_vegetarian, meal_type) not in self._libraries
+        ]
+        if not missing:
+            return
+
+        planned = select(MealPlan.id).where(MealPlan.meal_id == Meal.id)
+        query = (
+            select(Meal.id, Meal.name, Meal.protein, Meal.fiber, Meal.ingredients)
+            .where(or_(
+                ~exists(planned),
+                exists(planned.where(MealPlan.meal_type.in_(missing))),
+            ))
+        )
+        if is_vegetarian:
+            query = query.where(Meal.is_vegetarian.is_(True))
+        meals = (await self.db.execute(query)).all()
+
+        rows = await self.db.execute(
+            select(MealPlan.meal_id, MealPlan.meal_type)
+            .where(MealPlan.meal_id.isnot(None))
+            .where(MealPlan.meal_type.in_(missing))
+            .distinct()
+        )
+        for meal_id, planned_type in rows:
+            self._meal_types.setdefault(meal_id, set()).add(planned_type)
+
+        for meal_type in missing:
+            self._libraries[(is_vegetarian, meal_type)] = [
+                meal for meal in meals
+                if meal_type in self._meal_types.get(meal.id, {meal_type})
+            ]
+
+
+def _closeness(value: Optional[float], target: float) -> float:
+    if value is None or target <= 0:
+        return 0.0
+    return max(0.0, 1 - abs(value - target) / target)
+
+
+def _inventory_coverage(ingredients: Optional[List[Dict]], inventory: List[str]) -> float:
+    """Fraction of a meal's ingredients found in the inventory"""
+    if not inventory:
+        return 1.0
+    if not ingredients:
+        return 0.0
+
+    # Entries without a string name, e.g. plain strings from older replies,
+    # count as not covered
+    covered = sum(
+        1 for ingredient in ingredients
+        if isinstance(ingredient, dict) and isinstance(ingredient.get("name"), str)
+        and any(item in ingredient["name"].lower() for item in inventory)
+    )
+    return covered / len(ingredients)
@@ -0,0 +1,106 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+from prometheus_client import Counter, Gauge, Histogram
+
+# Generation stages take from milliseconds (queries) to a minute (LLM calls)
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+STAGE_SECONDS = Histogram(
+    "meal_generation_stage_seconds",
+    "Time spent in each stage of meal generation",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_seconds",
+    "Model server call latency, including streaming until the last token",
+    ["backend"],
+    buckets=STAGE_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Tokens reported by the model server",
+    ["backend", "kind"],
+)
+LLM_BACKEND_WINS = Counter(
+    "llm_backend_wins_total",
+    "Meal requests answered by each backend, counting hedged races",
+    ["backend"],
+)
+LLM_HEDGES = Counter(
+    "llm_hedged_requests_total",
+    "Hedged requests sent to a backend because the earlier one was slow",
+    ["backend"],
+)
+LLM_BACKEND_FAILURES = Counter(
+    "llm_backend_failures_total",
+    "Failed or timed out backend calls",
+    ["backend", "reason"],
+)
+LLM_CIRCUIT_OPEN = Gauge(
+    "llm_circuit_open",
+    "1 while a backend's circuit breaker is open",
+    ["backend"],
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency per route",
+    ["method", "route", "status"],
+    buckets=STAGE_BUCKETS,
+)
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed while serving one request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+DB_QUERIES = Counter(
+    "db_queries_total",
+    "SQL statements executed",
+)
+
+# A one-element list so statements run in the endpoint's task are added to
+# the counter the middleware created
+_request_queries: ContextVar[Optional[List[int]]] = ContextVar("request_queries", default=None)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time a block of generation work under the given stage name"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - started)
+
+
+@contextmanager
+def llm_span(backend: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        LLM_REQUEST_SECONDS.labels(backend).observe(time.perf_counter() - started)
+
+
+def record_tokens(backend: str, prompt_tokens: Optional[int], completion_tokens: Optional[int]):
+    if prompt_tokens:
+        LLM_TOKENS.labels(backend, "prompt").inc(prompt_tokens)
+    if completion_tokens:
+        LLM_TOKENS.labels(backend, "completion").inc(completion_tokens)
+
+
+def start_request_query_count() -> List[int]:
+    count = [0]
+    _request_queries.set(count)
+    return count
+
+
+def count_query(conn, cursor, statement, parameters, context, executemany):
+    """SQLAlchemy before_cursor_execute listener"""
+    DB_QUERIES.inc()
+    count = _request_queries.get()
+    if count is not None:
+        count[0] += 1
@@ -0,0 +1,272 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Optional
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncConnection
+from app.config import get_settings
+from app.database import SessionLocal, engine
+from app.models.pregeneration_run import PregenerationRun
+from app.models.user import User
+from app.services.meal_generator import MealGeneratorService, MEAL_TYPES
+
+settings = get_settings()
+
+# Postgres advisory lock held by whichever process is running pregeneration
+PREGENERATION_LOCK_KEY = 0x6D65616C
+
+
+class PregenerationScheduler:
+    """
+    Fills every user's empty meal slots for the coming days during off-peak
+    hours, so plans are ready before anyone asks for them. Runs at most once
+    a day; slots that are already planned are left alone, so a run cut short
+    by the end of the window or a restart is simply retried.
+
+    Every worker process runs the scheduler, and a Postgres advisory lock
+    lets only one of them run at a time. Slots the LLM fails on are left
+    empty rather than given the fallback meal, so a later run fills them.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        start_hour: int,
+        end_hour: int,
+        days_ahead: int,
+        max_concurrency: int,
+        check_interval_seconds: int
+    ):
+        self.enabled = enabled
+        self.start_hour = start_hour
+        self.end_hour = end_hour
+        self.days_ahead = days_ahead
+        self.max_concurrency = max_concurrency
+        self.check_interval_seconds = check_interval_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._run_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        # Runs interrupted by the last shutdown; while another process holds
+        # the lock, its run is still going
+        lock = await self._try_lock()
+        if lock:
+            try:
+                async with SessionLocal() as db:
+                    await db.execute(
+                        update(PregenerationRun)
+                        .where(PregenerationRun.status == "running")
+                        .values(status="stopped", finished_at=datetime.utcnow())
+                    )
+                    await db.commit()
+            finally:
+                await self._unlock(lock)
+
+        if self.enabled:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        tasks = [task for task in (self._task, self._run_task) if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._run_task = None
+
+    def in_window(self, now: Optional[datetime] = None) -> bool:
+        """Whether the local hour is inside the off-peak window, which may wrap midnight"""
+        hour = (now or datetime.now()).hour
+        if self.start_hour <= self.end_hour:
+            return self.start_hour <= hour < self.end_hour
+        return hour >= self.start_hour or hour < self.end_hour
+
+    async def trigger(self) -> PregenerationRun:
+        """Start a run now, outside the schedule. Fails if one is already running."""
+        lock = None
+        if not (self._run_task and not self._run_task.done()):
+            lock = await self._try_lock()
+        if lock is None:
+            raise RuntimeError("A pregeneration run is already in progress")
+
+        try:
+            run = await self._create_run()
+        except BaseException:
+            await self._unlock(lock)
+            raise
+        self._run_task = asyncio.create_task(self._run_locked(lock, run.id, respect_window=False))
+        return run
+
+    async def _loop(self):
+        while True:
+            try:
+                if self.in_window() and not (self._run_task and not self._run_task.done()):
+                    await self._start_scheduled_run()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Pregeneration scheduler check failed: {e}")
+            await asyncio.sleep(self.check_interval_seconds)
+
+    async def _start_scheduled_run(self):
+        lock = await self._try_lock()
+        if lock is None:
+            return
+
+        try:
+            run = None if await self._ran_today() else await self._create_run()
+        except BaseException:
+            await self._unlock(lock)
+            raise
+        if run is None:
+            await self._unlock(lock)
+            return
+        self._run_task = asyncio.create_task(self._run_locked(lock, run.id, respect_window=True))
+
+    async def _try_lock(self) -> Optional[AsyncConnection]:
+        """
+        The connection holding the pregeneration lock, or None if another
+        process has it. The lock is released by _unlock(), or by Postgres if
+        the process dies.
+        """
+        connection = await engine.connect()
+        try:
+            acquired = await connection.scalar(
+                select(func.pg_try_advisory_lock(PREGENERATION_LOCK_KEY)))
+            # The lock belongs to the session, so no transaction is left open
+            await connection.commit()
+        except BaseException:
+            await connection.close()
+            raise
+        if not acquired:
+            await connection.close()
+            return None
+        return connection
+
+    async def _unlock(self, connection: AsyncConnection):
+        try:
+            await connection.execute(select(func.pg_advisory_unlock(PREGENERATION_LOCK_KEY)))
+            await connection.commit()
+        finally:
+            await connection.close()
+
+    async def _run_locked(self, lock: AsyncConnection, run_id: int, respect_window: bool):
+        try:
+            await self._run(run_id, respect_window)
+        finally:
+            await self._unlock(lock)
+
+    async def _ran_today(self) -> bool:
+        async with SessionLocal() as db:
+            return await db.scalar(
+                select(PregenerationRun.id)
+                .where(PregenerationRun.start_date == date.today())
+                .where(PregenerationRun.status.in_(["running", "done"]))
+                .limit(1)
+            ) is not None
+
+    async def _create_run(self) -> PregenerationRun:
+        start_date = date.today()
+        async with SessionLocal() as db:
+            run = PregenerationRun(
+                status="running",
+                start_date=start_date,
+                end_date=start_date + timedelta(days=self.days_ahead - 1),
+            )
+            db.add(run)
+            await db.commit()
+            await db.refresh(run)
+            return run
+
+    async def _run(self, run_id: int, respect_window: bool):
+        async with SessionLocal() as db:
+            run = await db.get(PregenerationRun, run_id)
+            user_ids = (await db.execute(select(User.id).order_by(User.id))).scalars().all()
+            run.users_total = len(user_ids)
+            await db.commit()
+            print(f"Pregeneration run {run_id}: {len(user_ids)} users, "
+                  f"{run.start_date} to {run.end_date}")
+
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            # Users finish concurrently and each update reads the last one
+            run_lock = asyncio.Lock()
+            window_closed = False
+
+            async def generate_for(user_id: int):
+                nonlocal window_closed
+                async with semaphore:
+                    # Users not started before the window closes wait for the next run
+                    if respect_window and not self.in_window():
+                        window_closed = True
+                        return
+
+                    skipped = 0
+                    failed_slots = []
+
+                    async def on_progress(target_date: date, meal_type: str, status: str):
+                        nonlocal skipped
+                        if status == "skipped":
+                            skipped += 1
+                        elif status == "failed":
+                            failed_slots.append({
+                                "user_id": user_id,
+                                "date": target_date.isoformat(),
+                                "meal_type": meal_type,
+                            })
+
+                    error = None
+                    meal_plans = []
+                    async with SessionLocal() as generator_db:
+                        try:
+                            meal_plans = await MealGeneratorService(generator_db).generate_meal_plans(
+                                user_id,
+                                run.start_date,
+                                run.end_date,
+                                MEAL_TYPES,
+                                on_progress=on_progress,
+                                skip_filled=True,
+                                fallback=False
+                            )
+                        except asyncio.CancelledError:
+                            raise
+                        except Exception as e:
+                            error = f"User {user_id}: {e}"
+                            print(f"Pregeneration run {run_id} failed for user {user_id}: {e}")
+
+                    async with run_lock:
+                        if error:
+                            run.users_failed += 1
+                            run.error = error
+                        else:
+                            run.users_done += 1
+                            run.plans_created += len(meal_plans)
+                        run.slots_skipped += skipped
+                        if failed_slots:
+                            run.slots_failed += len(failed_slots)
+                            # Reassign rather than mutate so the JSON column is marked dirty
+                            run.failed_slots = run.failed_slots + failed_slots
+                        await db.commit()
+
+            try:
+                await asyncio.gather(*(generate_for(user_id) for user_id in user_ids))
+                run.status = "stopped" if window_closed else "done"
+            except asyncio.CancelledError:
+                # Shutting down: start() marks the run stopped next time
+                raise
+            except Exception as e:
+                run.status = "failed"
+                run.error = str(e)
+
+            run.finished_at = datetime.utcnow()
+            await db.commit()
+            print(f"Pregeneration run {run_id} {run.status}: {run.plans_created} plans created, "
+                  f"{run.slots_skipped} slots already planned, {run.slots_failed} slots failed, "
+                  f"{run.users_failed} users failed")
+
+
+pregeneration_scheduler = PregenerationScheduler(
+    enabled=settings.pregeneration_enabled,
+    start_hour=settings.pregeneration_start_hour,
+    end_hour=settings.pregeneration_end_hour,
+    days_ahead=settings.pregeneration_days_ahead,
+    max_concurrency=settings.pregeneration_max_concurrency,
+    check_interval_seconds=settings.pregeneration_check_interval_seconds
+)
@@ -0,0 +1,97 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional
+
+
+class _Broadcast:
+    """Items of one in-flight stream, kept so late subscribers can replay them"""
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self.changed = asyncio.Condition()
+        self.producer: Optional[asyncio.Task] = None
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time. Callers that arrive while it is
+    in flight share its result instead of starting their own. The call runs
+    in its own task, so one caller disconnecting doesn't cancel it for the
+    others. Coalescing is per process.
+    """
+
+    def __init__(self):
+        self.executed = 0
+        self.coalesced = 0
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._streams: Dict[Hashable, _Broadcast] = {}
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            self.executed += 1
+            task = asyncio.create_task(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(self._calls, key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def stream(self, key: Hashable, start: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """
+        Like do() for async iterators: every subscriber gets all items from
+        the first one on, and the stream's error if it fails.
+        """
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            self.executed += 1
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+            broadcast.producer = asyncio.create_task(self._produce(key, broadcast, start()))
+        else:
+            self.coalesced += 1
+
+        position = 0
+        while True:
+            async with broadcast.changed:
+                await broadcast.changed.wait_for(
+                    lambda: position < len(broadcast.items) or broadcast.finished)
+                items = broadcast.items[position:]
+                finished = broadcast.finished
+            for item in items:
+                yield item
+            position += len(items)
+            if finished and position == len(broadcast.items):
+                if broadcast.error:
+                    raise broadcast.error
+                return
+
+    async def _produce(self, key: Hashable, broadcast: _Broadcast, items: AsyncIterator[Any]):
+        try:
+            async for item in items:
+                async with broadcast.changed:
+                    broadcast.items.append(item)
+                    broadcast.changed.notify_all()
+        except Exception as e:
+            broadcast.error = e
+        finally:
+            self._forget(self._streams, key, broadcast)
+            async with broadcast.changed:
+                broadcast.finished = True
+                broadcast.changed.notify_all()
+
+    @staticmethod
+    def _forget(flights: Dict[Hashable, Any], key: Hashable, flight: Any):
+        if flights.get(key) is flight:
+            del flights[key]
+
+    def as_dict(self) -> Dict:
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls) + len(self._streams),
+        }
+
+
+generation_flights = SingleFlight()
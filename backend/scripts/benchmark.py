@@ -0,0 +1,242 @@
+"""
+End-to-end benchmark of meal generation and the list endpoints.
+
+Requests go through the ASGI app in-process against the configured local
+database, with the fake LLM backend so no model server is needed. The users,
+plans and meals it creates are deleted at the end unless --keep-data. Run from
+the backend directory after `alembic upgrade head`:
+    python scripts/benchmark.py --users 10 --requests 50 --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from collections import Counter
+from datetime import date, timedelta
+from typing import Callable, Dict, List
+
+# Must be set before the app reads its settings
+os.environ.setdefault("FAKE_LLM_ENABLED", "true")
+sys.path.insert(0, os.getcwd())
+
+import httpx  # noqa: E402
+from sqlalchemy import delete, event, exists, text  # noqa: E402
+from app.database import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.meal import Meal  # noqa: E402
+from app.models.meal_plan import MealPlan  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def summarize(name: str, latencies: List[float], errors: Counter, elapsed: float, queries: int) -> Dict:
+    requests = len(latencies) + sum(errors.values())
+    # quantiles() needs at least two points
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {
+        "scenario": name,
+        "requests": requests,
+        "errors": sum(errors.values()),
+        "error_statuses": dict(errors),
+        "p50_ms": cuts[49] * 1000 if cuts else None,
+        "p95_ms": cuts[94] * 1000 if cuts else None,
+        "p99_ms": cuts[98] * 1000 if cuts else None,
+        "throughput_rps": requests / elapsed if elapsed else 0.0,
+        "db_queries": queries,
+        "db_queries_per_request": queries / requests if requests else 0.0,
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    counter: QueryCounter,
+    name: str,
+    make_request: Callable[[int], Dict],
+    total: int,
+    concurrency: int,
+    conditional: bool = False
+) -> Dict:
+    """
+    Send `total` requests built by make_request(i), at most `concurrency` at a
+    time. When conditional, GETs revalidate the last ETag seen for their URL.
+    """
+    latencies: List[float] = []
+    errors: Counter = Counter()
+    pending = iter(range(total))
+    etags: Dict[str, str] = {}
+
+    async def worker():
+        for index in pending:
+            request = make_request(index)
+            key = f"{request['url']}?{sorted(request.get('params', {}).items())}"
+            if conditional and key in etags:
+                request["headers"] = {"If-None-Match": etags[key]}
+            started = time.perf_counter()
+            response = await client.request(**request)
+            if response.status_code >= 400:
+                errors[response.status_code] += 1
+            else:
+                latencies.append(time.perf_counter() - started)
+                if "etag" in response.headers:
+                    etags[key] = response.headers["etag"]
+
+    queries_before = counter.count
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return summarize(name, latencies, errors, elapsed, counter.count - queries_before)
+
+
+async def cleanup(user_ids: List[int], last_meal_id: int):
+    """Remove the benchmark users, their plans and the meals generated for them"""
+    async with SessionLocal() as db:
+        await db.execute(delete(MealPlan).where(MealPlan.user_id.in_(user_ids)))
+        await db.execute(delete(User).where(User.id.in_(user_ids)))
+        # Meals created during the run that no one else has planned since
+        await db.execute(
+            delete(Meal)
+            .where(Meal.id > last_meal_id)
+            .where(~exists().where(MealPlan.meal_id == Meal.id))
+        )
+        await db.commit()
+
+
+async def benchmark(args) -> List[Dict]:
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+
+    # Meals inserted from here on get ids past the sequence's current value,
+    # even where rows were inserted with explicit ids
+    async with SessionLocal() as db:
+        last_meal_id = await db.scalar(text(
+            "SELECT coalesce(pg_sequence_last_value(pg_get_serial_sequence('meals', 'id')), 0)"))
+
+    transport = httpx.ASGITransport(app=app)
+    user_ids = []
+    try:
+        async with httpx.AsyncClient(
+                transport=transport, base_url="http://benchmark", timeout=None) as client:
+            results = await run_benchmark(client, counter, args, user_ids)
+    finally:
+        if not args.keep_data:
+            await cleanup(user_ids, last_meal_id)
+        await engine.dispose()
+    return results
+
+
+async def run_benchmark(
+    client: httpx.AsyncClient,
+    counter: QueryCounter,
+    args,
+    user_ids: List[int]
+) -> List[Dict]:
+    """Create the users, appending to user_ids as they are made, and run every scenario"""
+    run_id = uuid.uuid4().hex[:8]
+    for index in range(args.users):
+        response = await client.post("/api/users/", json={
+            "name": f"Benchmark {run_id} {index}",
+            "is_vegetarian": index % 2 == 0,
+            "protein_target": 120,
+            "fiber_target": 30,
+        })
+        response.raise_for_status()
+        user_ids.append(response.json()["id"])
+
+    # Every request gets its own (user, date) so no slot is generated twice
+    start = date.today() + timedelta(days=args.start_offset_days)
+
+    def generate(index: int) -> Dict:
+        return {
+            "method": "POST",
+            "url": f"/api/meal-plans/generate/{user_ids[index % len(user_ids)]}",
+            "params": {
+                "target_date": (start + timedelta(days=index // len(user_ids))).isoformat(),
+                "bypass_cache": args.bypass_cache,
+            },
+        }
+
+    generated_range = {
+        "start_date": start.isoformat(),
+        "end_date": (start + timedelta(days=args.requests // len(user_ids))).isoformat(),
+    }
+
+    def plan_details(index: int) -> Dict:
+        return {
+            "method": "GET",
+            "url": f"/api/meal-plans/user/{user_ids[index % len(user_ids)]}/details",
+            "params": generated_range,
+        }
+
+    def list_meals(index: int) -> Dict:
+        return {"method": "GET", "url": "/api/meals/", "params": {"limit": 50}}
+
+    def list_plans(index: int) -> Dict:
+        return {
+            "method": "GET",
+            "url": f"/api/meal-plans/user/{user_ids[index % len(user_ids)]}",
+            "params": generated_range,
+        }
+
+    results = [await run_scenario(
+        client, counter, "generate", generate, args.requests, args.concurrency)]
+    for name, make_request in [
+        ("list_meals", list_meals),
+        ("list_meal_plans", list_plans),
+        ("meal_plan_details", plan_details),
+    ]:
+        results.append(await run_scenario(
+            client, counter, name, make_request, args.list_requests, args.concurrency,
+            conditional=args.conditional))
+
+    return results
+
+
+def print_table(results: List[Dict]):
+    columns = ["scenario", "requests", "errors", "p50_ms", "p95_ms", "p99_ms",
+               "throughput_rps", "db_queries_per_request"]
+    print(" ".join(f"{column:>22}" for column in columns))
+    for result in results:
+        cells = []
+        for column in columns:
+            value = result[column]
+            cells.append(f"{value:>22.1f}" if isinstance(value, float) else f"{str(value):>22}")
+        print(" ".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=50, help="generation requests")
+    parser.add_argument("--list-requests", type=int, default=200, help="requests per list endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--bypass-cache", action="store_true",
+                        help="skip the meal library and LLM cache so every slot hits the LLM")
+    parser.add_argument("--conditional", action="store_true",
+                        help="list requests send If-None-Match with the last ETag for their URL")
+    parser.add_argument("--start-offset-days", type=int, default=365,
+                        help="generate this far ahead to stay clear of real plans")
+    parser.add_argument("--keep-data", action="store_true",
+                        help="leave the benchmark users, plans and meals in the database")
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(benchmark(args))
+    print_table(results)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"args": vars(args), "results": results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Check that importing the API stays within a time budget and does not pull in
+modules that should only load on demand.
+
+Run from the backend directory:
+    python scripts/check_import_time.py --budget-ms 1500
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+# Loaded lazily by the services that need them
+DEFERRED_MODULES = ["openai", "ollama", "numpy"]
+
+PROBE = (
+    "import sys, app.main; "
+    "print(','.join(m for m in {modules!r} if m in sys.modules))"
+)
+
+
+def measure(module: str) -> tuple[float, list[str]]:
+    """Import the module in a fresh interpreter and return (ms, deferred modules loaded)"""
+    env = {**os.environ, "PYTHONPATH": os.getcwd()}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(modules=DEFERRED_MODULES)],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+
+    cumulative = None
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)$", line)
+        if match and match.group(2) == module:
+            cumulative = int(match.group(1)) / 1000
+    if cumulative is None:
+        raise RuntimeError(f"No import time reported for {module}")
+
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return cumulative, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=1500)
+    parser.add_argument("--runs", type=int, default=3,
+                        help="best of this many runs is compared to the budget")
+    args = parser.parse_args()
+
+    timings = []
+    for _ in range(args.runs):
+        elapsed, loaded = measure("app.main")
+        timings.append(elapsed)
+
+    best = min(timings)
+    print(f"import app.main: best {best:.0f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    if best > args.budget_ms:
+        print("FAIL: import time is over budget")
+        failed = True
+    if loaded:
+        print(f"FAIL: imported at startup: {', '.join(loaded)}")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+import requests
+import streamlit as st
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+load_dotenv()
+
+API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
+
+# (connect, read) seconds; generation waits on the LLM so it gets a longer read timeout
+TIMEOUT = (3.05, 15)
+GENERATION_TIMEOUT = (3.05, 300)
+
+# Last ETag and body per URL, so unchanged data comes back as an empty 304.
+# Least recently used URLs are dropped past the limit; fetch_all() threads
+# share it, hence the lock.
+VALIDATED_MAX_ENTRIES = 128
+_validated: "OrderedDict[str, Tuple[str, Any]]" = OrderedDict()
+_validated_lock = threading.Lock()
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """One keep-alive session shared by every rerun, page and browser tab"""
+    retry = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=(502, 503, 504),
+        # Only idempotent requests are retried, never POSTs
+        allowed_methods=("GET", "PATCH", "DELETE"),
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_maxsize=10)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def request(method: str, path: str, **kwargs) -> requests.Response:
+    kwargs.setdefault("timeout", TIMEOUT)
+    return get_session().request(method, f"{API_BASE_URL}{path}", **kwargs)
+
+
+def _get_json(path: str, params: Dict = None) -> Any:
+    key = f"{path}?{sorted((params or {}).items())}"
+    with _validated_lock:
+        validated = _validated.get(key)
+        if validated:
+            _validated.move_to_end(key)
+    headers = {"If-None-Match": validated[0]} if validated else {}
+    response = request("GET", path, params=params, headers=headers)
+    if response.status_code == 304 and validated:
+        return validated[1]
+
+    response.raise_for_status()
+    body = response.json()
+    if "ETag" in response.headers:
+        with _validated_lock:
+            _validated[key] = (response.headers["ETag"], body)
+            _validated.move_to_end(key)
+            while len(_validated) > VALIDATED_MAX_ENTRIES:
+                _validated.popitem(last=False)
+    return body
+
+
+# Cached lookups raise on errors so failures are never cached. No spinners,
+# since fetch_all() calls them from worker threads.
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_users() -> List[Dict]:
+    return _get_json("/api/users")
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_inventory() -> List[Dict]:
+    return _get_json("/api/inventory")
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_meal_plan_details(user_id: int, start_date: str, end_date: str) -> List[Dict]:
+    return _get_json(
+        f"/api/meal-plans/user/{user_id}/details",
+        params={"start_date": start_date, "end_date": end_date}
+    )
+
+
+def invalidate_users():
+    fetch_users.clear()
+
+
+def invalidate_inventory():
+    fetch_inventory.clear()
+
+
+def invalidate_meal_plans():
+    fetch_meal_plan_details.clear()
+
+
+def fetch_all(*calls: Callable[[], Any]) -> List[Any]:
+    """Run independent fetches concurrently, returning results in order"""
+    with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+        futures = [executor.submit(call) for call in calls]
+        return [future.result() for future in futures]
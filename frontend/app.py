@@ -1,12 +1,7 @@
 import streamlit as st
-import requests
+import json
 from datetime import date
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
+from api import GENERATION_TIMEOUT, fetch_users, invalidate_meal_plans, invalidate_users, request
 
 st.set_page_config(
     page_title="Meal Planner",
@@ -16,13 +11,11 @@ st.set_page_config(
 
 st.sidebar.title("Meal Planner")
 
-if 'users' not in st.session_state:
-    try:
-        response = requests.get(f"{API_BASE_URL}/api/users")
-        print('Got response from /api/users:', response.status_code)
-        st.session_state.users = response.json() if response.status_code == 200 else []
-    except:
-        st.session_state.users = []
+try:
+    st.session_state.users = fetch_users()
+except Exception as e:
+    print('Failed to fetch /api/users:', e)
+    st.session_state.users = []
 
 if 'selected_user' not in st.session_state:
     st.session_state.selected_user = None
@@ -46,8 +39,8 @@ with st.sidebar.expander("Add New User"):
 
         if st.form_submit_button("Create User"):
             try:
-                response = requests.post(
-                    f"{API_BASE_URL}/api/users",
+                response = request(
+                    "POST", "/api/users",
                     json={
                         "name": name,
                         "is_vegetarian": is_veg,
@@ -56,6 +49,7 @@ with st.sidebar.expander("Add New User"):
                     }
                 )
                 if response.status_code == 200:
+                    invalidate_users()
                     st.success(f"User {name} created!")
                     st.rerun()
             except Exception as e:
@@ -85,25 +79,64 @@ if st.session_state.selected_user:
     col1, col2 = st.columns(2)
 
     with col1:
-        if st.button("Generate Today's Meals", use_container_width=True):
-            with st.spinner("Generating meals..."):
-                try:
-                    response = requests.post(
-                        f"{API_BASE_URL}/api/meal-plans/generate/{user['id']}",
-                        params={"target_date": str(date.today())}
-                    )
-                    if response.status_code == 200:
-                        st.success("Today's meals generated!")
-                        st.balloons()
-                    else:
-                        st.error(f"Error: {response.text}")
-                except Exception as e:
-                    st.error(f"Error: {e}")
+        generate_clicked = st.button(
+            "Generate Today's Meals", use_container_width=True)
 
     with col2:
         st.page_link("pages/1_Meal_Plans.py",
                      label="View Meal Plans", use_container_width=True)
 
+    if generate_clicked:
+        meal_columns = dict(zip(["breakfast", "lunch", "dinner"], st.columns(3)))
+        placeholders = {}
+        for meal_type, column in meal_columns.items():
+            with column:
+                st.markdown(f"### {meal_type.capitalize()}")
+                placeholders[meal_type] = st.empty()
+                placeholders[meal_type].info("Cooking up ideas...")
+
+        streamed_chars = {meal_type: 0 for meal_type in meal_columns}
+        try:
+            response = request(
+                "POST", f"/api/meal-plans/generate/{user['id']}/stream",
+                params={"target_date": str(date.today())},
+                stream=True,
+                timeout=GENERATION_TIMEOUT
+            )
+            if response.status_code != 200:
+                st.error(f"Error: {response.text}")
+            else:
+                event = None
+                for line in response.iter_lines(decode_unicode=True):
+                    if line.startswith("event: "):
+                        event = line[len("event: "):]
+                        continue
+                    if not line.startswith("data: "):
+                        continue
+
+                    data = json.loads(line[len("data: "):])
+                    if event == "token":
+                        streamed_chars[data['meal_type']] += len(data['text'])
+                        placeholders[data['meal_type']].info(
+                            f"Writing recipe... ({streamed_chars[data['meal_type']]} characters)")
+                    elif event == "meal":
+                        meal = data['meal']
+                        with placeholders[data['meal_type']].container():
+                            st.markdown(f"**{meal['name']}**")
+                            st.caption(meal['description'])
+                            st.markdown(
+                                f"Protein: {meal['protein']}g · Fiber: {meal['fiber']}g · "
+                                f"Calories: {meal['calories']}")
+                    elif event == "done":
+                        st.success("Today's meals generated!")
+                        st.balloons()
+                    elif event == "error":
+                        st.error(f"Error: {data['detail']}")
+                # Meals are saved one by one, so even a failed stream may have added some
+                invalidate_meal_plans()
+        except Exception as e:
+            st.error(f"Error: {e}")
+
     st.divider()
 
     st.info("""
@@ -1,23 +1,43 @@
 import streamlit as st
-import requests
+import time
 from datetime import date, timedelta
-import os
-
-API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
+from api import fetch_all, fetch_meal_plan_details, fetch_users, invalidate_meal_plans, request
 
 st.set_page_config(page_title="Meal Plans", page_icon="📅", layout="wide")
 
+if 'selected_user' not in st.session_state:
+    st.session_state.selected_user = None
+
+default_start_date = date.today() - timedelta(days=3)
+default_end_date = date.today() + timedelta(days=3)
+
 
-if 'selected_user' not in st.session_state or not st.session_state.selected_user:
+def load_plans(user_id, start, end):
+    # Errors are kept and shown where the plans are rendered
     try:
-        response = requests.get(f"{API_BASE_URL}/api/users")
-        print('Got response from /api/users:', response.status_code)
-        st.session_state.users = response.json() if response.status_code == 200 else []
-    except:
-        st.session_state.users = []
+        return fetch_meal_plan_details(user_id, str(start), str(end))
+    except Exception as e:
+        return e
 
-if 'selected_user' not in st.session_state:
-    st.session_state.selected_user = None
+
+def load_users():
+    try:
+        return fetch_users()
+    except Exception as e:
+        print('Failed to fetch /api/users:', e)
+        return []
+
+
+# The previously selected user's plans are fetched alongside the user list;
+# the date inputs below keep their values in session state under these keys
+prefetched_user = st.session_state.selected_user
+prefetch_range = (st.session_state.get('plans_start_date', default_start_date),
+                  st.session_state.get('plans_end_date', default_end_date))
+if prefetched_user:
+    st.session_state.users, prefetched_plans = fetch_all(
+        load_users, lambda: load_plans(prefetched_user['id'], *prefetch_range))
+else:
+    st.session_state.users, prefetched_plans = load_users(), None
 
 if st.session_state.users:
     user_names = [u['name'] for u in st.session_state.users]
@@ -25,7 +45,9 @@ if st.session_state.users:
     st.session_state.selected_user = next(
         u for u in st.session_state.users if u['name'] == selected_name)
 else:
+    st.session_state.selected_user = None
     st.warning("No users found. Create users on the home page first!")
+    st.stop()
 
 
 user = st.session_state.selected_user
@@ -33,53 +55,46 @@ user = st.session_state.selected_user
 col1, col2, col3 = st.columns([2, 2, 1])
 
 with col1:
-    start_date = st.date_input("From", value=date.today() - timedelta(days=3))
+    start_date = st.date_input("From", value=default_start_date, key='plans_start_date')
 with col2:
-    end_date = st.date_input("To", value=date.today() + timedelta(days=3))
+    end_date = st.date_input("To", value=default_end_date, key='plans_end_date')
 with col3:
     if st.button("Refresh", use_container_width=True, icon="🔄"):
+        invalidate_meal_plans()
         st.rerun()
 
 st.divider()
 
 try:
-    response = requests.get(
-        f"{API_BASE_URL}/api/meal-plans/user/{user['id']}",
-        params={
-            "start_date": str(start_date),
-            "end_date": str(end_date)
-        }
-    )
-
-    if response.status_code == 200:
-        meal_plans = response.json()
-
-        if not meal_plans:
+    # Plans come back grouped by date and ordered by meal type, with their meals attached
+    if prefetched_user and prefetched_user['id'] == user['id'] and prefetch_range == (start_date, end_date):
+        days = prefetched_plans
+    else:
+        days = load_plans(user['id'], start_date, end_date)
+
+    if not isinstance(days, Exception):
+        if not days:
             st.info("No meal plans found for this date range. Generate some meals!")
         else:
-            from collections import defaultdict
-            plans_by_date = defaultdict(list)
-            for plan in meal_plans:
-                plans_by_date[plan['date']].append(plan)
-
-            for plan_date in sorted(plans_by_date.keys()):
+            for day in days:
+                plan_date = day['date']
                 is_today = plan_date == str(date.today())
                 date_label = f"TODAY ({plan_date})" if is_today else plan_date
 
                 with st.expander(f"**{date_label}**", expanded=is_today):
-                    daily_plans = plans_by_date[plan_date]
+                    daily_plans = day['plans']
 
                     if st.button(f"Delete Entire Day", key=f"delete_day_{plan_date}",
                                  type="primary", width="stretch", icon="🗑️"):
                         try:
-                            deleted_count = 0
-                            for plan in daily_plans:
-                                response = requests.delete(
-                                    f"{API_BASE_URL}/api/meal-plans/{plan['id']}")
-                                if response.status_code == 200:
-                                    deleted_count += 1
+                            response = request(
+                                "DELETE", f"/api/meal-plans/user/{user['id']}",
+                                params={"start_date": plan_date, "end_date": plan_date}
+                            )
+                            deleted_count = response.json()['deleted'] if response.status_code == 200 else 0
 
                             if deleted_count > 0:
+                                invalidate_meal_plans()
                                 st.success(
                                     f"Deleted {deleted_count} meal(s) for {plan_date}! ✅")
                                 st.rerun()
@@ -91,7 +106,7 @@ try:
                     st.divider()
 
                     cols = st.columns(3)
-                    for idx, plan in enumerate(sorted(daily_plans, key=lambda x: ['breakfast', 'lunch', 'dinner'].index(x['meal_type']))):
+                    for idx, plan in enumerate(daily_plans):
                         with cols[idx]:
                             meal_type = plan['meal_type'].capitalize()
                             emoji = {"breakfast": "🌅", "lunch": "☀️",
@@ -102,48 +117,46 @@ try:
                             if plan['eaten_outside']:
                                 st.warning("🏪 Eaten Outside")
                                 if st.button(f"Mark as Home Cooked", key=f"home_{plan['id']}"):
-                                    requests.patch(
-                                        f"{API_BASE_URL}/api/meal-plans/{plan['id']}/eaten-outside",
+                                    request(
+                                        "PATCH", f"/api/meal-plans/{plan['id']}/eaten-outside",
                                         params={"eaten_outside": False}
                                     )
+                                    invalidate_meal_plans()
+                                    st.rerun()
+                            elif plan['meal']:
+                                meal = plan['meal']
+                                st.markdown(f"**{meal['name']}**")
+                                st.caption(meal['description'])
+                                st.markdown(f"**Cooking time: {meal['prep_time_minutes']} minutes**")
+
+                                st.markdown("**Nutrition:**")
+                                st.markdown(f"- Protein: {meal['protein']}g")
+                                st.markdown(f"- Fiber: {meal['fiber']}g")
+                                st.markdown(f"- Calories: {meal['calories']}")
+                                st.markdown(f"- Carbs: {meal['carbs']}g")
+                                st.markdown(f"- Fats: {meal['fats']}g")
+
+                                with st.expander("📝 Ingredients"):
+                                    for ing in meal['ingredients']:
+                                        st.markdown(f"- {ing['quantity']} {ing['unit']} {ing['name']}")
+
+                                if meal.get('instructions'):
+                                    with st.expander("👨‍🍳 Instructions"):
+                                        st.markdown(meal['instructions'])
+
+                                if st.button(f"Mark as Eaten Outside", key=f"outside_{plan['id']}"):
+                                    request(
+                                        "PATCH", f"/api/meal-plans/{plan['id']}/eaten-outside",
+                                        params={"eaten_outside": True}
+                                    )
+                                    invalidate_meal_plans()
                                     st.rerun()
-                            elif plan['meal_id']:
-                                meal_response = requests.get(
-                                    f"{API_BASE_URL}/api/meals/{plan['meal_id']}")
-                                if meal_response.status_code == 200:
-                                    meal = meal_response.json()
-
-                                    st.markdown(f"**{meal['name']}**")
-                                    st.caption(meal['description'])
-                                    st.markdown(f"**Cooking time: {meal['prep_time_minutes']} minutes**")
-
-                                    st.markdown("**Nutrition:**")
-                                    st.markdown(f"- Protein: {meal['protein']}g")
-                                    st.markdown(f"- Fiber: {meal['fiber']}g")
-                                    st.markdown(f"- Calories: {meal['calories']}")
-                                    st.markdown(f"- Carbs: {meal['carbs']}g")
-                                    st.markdown(f"- Fats: {meal['fats']}g")
-
-                                    with st.expander("📝 Ingredients"):
-                                        for ing in meal['ingredients']:
-                                            st.markdown(f"- {ing['quantity']} {ing['unit']} {ing['name']}")
-
-                                    if meal.get('instructions'):
-                                        with st.expander("👨‍🍳 Instructions"):
-                                            st.markdown(meal['instructions'])
-
-                                    if st.button(f"Mark as Eaten Outside", key=f"outside_{plan['id']}"):
-                                        requests.patch(
-                                            f"{API_BASE_URL}/api/meal-plans/{plan['id']}/eaten-outside",
-                                            params={"eaten_outside": True}
-                                        )
-                                        st.rerun()
                             else:
                                 st.info("No meal planned")
 
                     st.divider()
     else:
-        st.error("Failed to fetch meal plans")
+        st.error(f"Failed to fetch meal plans: {days}")
 
 except Exception as e:
     st.error(f"Error: {e}")
@@ -151,22 +164,48 @@ except Exception as e:
 st.divider()
 st.subheader("Generate New Meals")
 
-gen_col1, gen_col2 = st.columns([3, 1])
+gen_col1, gen_col2, gen_col3 = st.columns([2, 2, 1])
 
 with gen_col1:
-    gen_date = st.date_input("Generate meals for date:", value=date.today())
+    gen_start_date = st.date_input("Generate meals from:", value=date.today())
 with gen_col2:
-    if st.button("Generate", use_container_width=True, icon="🎲"):
-        with st.spinner("Generating meals... This may take a minute."):
-            try:
-                response = requests.post(
-                    f"{API_BASE_URL}/api/meal-plans/generate/{user['id']}",
-                    params={"target_date": str(gen_date)}
-                )
-                if response.status_code == 200:
-                    st.success("✅ Meals generated!")
-                    st.rerun()
-                else:
-                    st.error(f"Error: {response.text}")
-            except Exception as e:
-                st.error(f"Error: {e}")
+    gen_end_date = st.date_input("Until:", value=date.today())
+with gen_col3:
+    generate_clicked = st.button("Generate", use_container_width=True, icon="🎲")
+
+keep_planned = st.checkbox("Keep meals that are already planned", value=False)
+
+if generate_clicked:
+    try:
+        response = request(
+            "POST", f"/api/meal-plans/jobs/{user['id']}",
+            params={
+                "start_date": str(gen_start_date),
+                "end_date": str(gen_end_date),
+                "skip_filled": keep_planned
+            }
+        )
+        if response.status_code != 200:
+            st.error(f"Error: {response.text}")
+        else:
+            job = response.json()
+            progress_bar = st.progress(0.0, text="Queued...")
+
+            while job['status'] in ("queued", "running"):
+                time.sleep(2)
+                job = request("GET", f"/api/meal-plans/jobs/{job['id']}").json()
+                slots = job['progress']
+                finished = sum(1 for slot in slots if slot['status'] in ("done", "skipped"))
+                if slots:
+                    progress_bar.progress(
+                        finished / len(slots),
+                        text=f"Generated {finished} of {len(slots)} meals...")
+
+            invalidate_meal_plans()
+            if job['status'] == "done":
+                st.success("✅ Meals generated!")
+                st.rerun()
+            else:
+                st.error(f"Generation {job['status']}: {job.get('error') or ''}")
+    except Exception as e:
+        st.error(f"Error: {e}")
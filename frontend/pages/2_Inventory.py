@@ -1,8 +1,5 @@
 import streamlit as st
-import requests
-import os
-
-API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
+from api import fetch_inventory, invalidate_inventory, request
 
 st.set_page_config(page_title="Inventory", page_icon="🛒", layout="wide")
 
@@ -27,11 +24,12 @@ with col_center:
 
     if submit and new_item and quantity > 0:
         try:
-            response = requests.post(
-                f"{API_BASE_URL}/api/inventory",
+            response = request(
+                "POST", "/api/inventory",
                 json={"item_name": new_item.lower().strip()}
             )
             if response.status_code == 200:
+                invalidate_inventory()
                 st.success(f"✅ Added {new_item}")
                 st.rerun()
             else:
@@ -45,36 +43,31 @@ st.divider()
 st.subheader("📋 Current Inventory")
 
 try:
-    response = requests.get(f"{API_BASE_URL}/api/inventory")
-
-    if response.status_code == 200:
-        items = response.json()
-        num_cols = 4
-
-        if not items:
-            st.info("Your inventory is empty. Add some items to get started!")
-        else:
-            # Display in a grid
-            cols = st.columns(num_cols)
-            for idx, item in enumerate(items):
-                with cols[idx % num_cols]:
-                    with st.container():
-                        col_a, col_b = st.columns([3, 1])
-                        with col_a:
-                            st.markdown(f"**{item['item_name'].title()}**")
-                        with col_b:
-                            if st.button("🗑️", key=f"del_{item['id']}", help="Delete"):
-                                requests.delete(
-                                    f"{API_BASE_URL}/api/inventory/{item['id']}")
-                                st.rerun()
+    items = fetch_inventory()
+    num_cols = 4
 
-            st.divider()
-            st.caption(f"Total items: {len(items)}")
+    if not items:
+        st.info("Your inventory is empty. Add some items to get started!")
     else:
-        st.error("Failed to fetch inventory")
+        # Display in a grid
+        cols = st.columns(num_cols)
+        for idx, item in enumerate(items):
+            with cols[idx % num_cols]:
+                with st.container():
+                    col_a, col_b = st.columns([3, 1])
+                    with col_a:
+                        st.markdown(f"**{item['item_name'].title()}**")
+                    with col_b:
+                        if st.button("🗑️", key=f"del_{item['id']}", help="Delete"):
+                            request("DELETE", f"/api/inventory/{item['id']}")
+                            invalidate_inventory()
+                            st.rerun()
+
+        st.divider()
+        st.caption(f"Total items: {len(items)}")
 
 except Exception as e:
-    st.error(f"Error: {e}")
+    st.error(f"Failed to fetch inventory: {e}")
 
 # Tips
 st.divider()